@@ -0,0 +1,122 @@
+"""
+Tests of canvas graphs.
+
+These tests need a display and are skipped if Tk cannot be initialized.
+"""
+
+import tkinter as tk
+import unittest
+
+from tkCanvasGraph import CanvasGraph, Vertex, Edge
+
+
+class CanvasTestCase(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as error:
+            self.skipTest("Tk cannot be initialized: {}".format(error))
+        self.root.withdraw()
+        self.canvas = CanvasGraph(self.root)
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+class TestBatchedCreation(CanvasTestCase):
+
+    def test_items_created_in_batch(self):
+        canvas = self.canvas
+        with canvas.batch():
+            handles = [canvas.create_oval(0, 0, index, index, tags="test")
+                       for index in range(1, 4)]
+        self.assertEqual(list(canvas.find_withtag("test")), handles)
+        self.assertEqual(canvas.coords(handles[2]), [0, 0, 3, 3])
+
+    def test_bulk_insertion(self):
+        vertices = [Vertex(self.canvas, label=str(index))
+                    for index in range(10)]
+        self.canvas.add_vertices(vertices)
+        self.canvas.add_edges(Edge(self.canvas, origin, end)
+                              for origin, end in zip(vertices, vertices[1:]))
+        for element in self.canvas.vertices | self.canvas.edges:
+            for handle in element.handles:
+                self.assertIs(self.canvas.element_by_handle(handle), element)
+                self.assertIn(element.tag, self.canvas.gettags(handle))
+
+
+class TestItemReuse(CanvasTestCase):
+
+    def test_options_set_on_items_are_reset(self):
+        canvas = self.canvas
+        vertex = Vertex(canvas, label="a")
+        canvas.add_vertex(vertex)
+        handle = vertex._handle
+        defaults = {name: canvas.itemconfigure(handle, name)[3]
+                    for name in ("width", "dash")}
+        canvas.itemconfig(handle, width=7, dash=(2, 2))
+        canvas.delete_element(vertex)
+
+        other = Vertex(canvas, label="b")
+        canvas.add_vertex(other)
+        self.assertEqual(other._handle, handle)
+        for name, default in defaults.items():
+            self.assertEqual(canvas.itemcget(handle, name), default)
+
+
+class TestIncidenceIndex(CanvasTestCase):
+
+    def setUp(self):
+        super(TestIncidenceIndex, self).setUp()
+        canvas = self.canvas
+        self.a, self.b, self.c = (Vertex(canvas, label=label)
+                                  for label in "abc")
+        canvas.add_vertices((self.a, self.b, self.c))
+        self.ab = Edge(canvas, self.a, self.b)
+        self.ab2 = Edge(canvas, self.a, self.b)
+        self.ca = Edge(canvas, self.c, self.a)
+        canvas.add_edge(self.ab)
+        canvas.add_edges((self.ab2, self.ca))
+
+    def test_queries(self):
+        canvas = self.canvas
+        self.assertEqual(canvas.outgoing_edges(self.a), {self.ab, self.ab2})
+        self.assertEqual(canvas.incoming_edges(self.a), {self.ca})
+        self.assertEqual(canvas.edges_of(self.a),
+                         {self.ab, self.ab2, self.ca})
+        self.assertEqual(canvas.neighbors(self.a), {self.b, self.c})
+        self.assertEqual(canvas.neighbors(self.b), {self.a})
+        self.assertEqual(canvas.edges_between(self.a, self.b),
+                         {self.ab, self.ab2})
+        self.assertEqual(canvas.edges_between(self.b, self.a), set())
+
+    def test_returned_sets_are_copies(self):
+        self.canvas.outgoing_edges(self.a).clear()
+        self.canvas.edges_between(self.a, self.b).clear()
+        self.assertEqual(self.canvas.outgoing_edges(self.a),
+                         {self.ab, self.ab2})
+        self.assertEqual(self.canvas.edges_between(self.a, self.b),
+                         {self.ab, self.ab2})
+
+    def test_delete_edge(self):
+        self.canvas.delete_element(self.ab)
+        self.assertEqual(self.canvas.outgoing_edges(self.a), {self.ab2})
+        self.assertEqual(self.canvas.edges_between(self.a, self.b),
+                         {self.ab2})
+
+    def test_delete_vertex(self):
+        deleted = self.canvas.delete_elements((self.a,))
+        self.assertEqual(deleted, {self.a, self.ab, self.ab2, self.ca})
+        self.assertEqual(self.canvas.edges_of(self.b), set())
+        self.assertEqual(self.canvas.outgoing_edges(self.c), set())
+        self.assertEqual(self.canvas.neighbors(self.c), set())
+
+    def test_clear(self):
+        self.canvas.clear()
+        for vertex in (self.a, self.b, self.c):
+            self.assertEqual(self.canvas.edges_of(vertex), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Tests of the levels of detail.
+"""
+
+import unittest
+
+from tkCanvasGraph.lod import LevelOfDetail, LevelOfDetailPolicy
+
+
+class TestLevelOfDetailPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = LevelOfDetailPolicy(min_label_size=6, min_vertex_size=5,
+                                          min_edge_scale=0.5)
+
+    def test_full_detail(self):
+        self.assertEqual(self.policy.level(1, 15, 30), LevelOfDetail())
+
+    def test_labels_depend_on_their_height(self):
+        self.assertTrue(self.policy.level(0.25, 6, 30).labels)
+        self.assertFalse(self.policy.level(1, 5, 30).labels)
+
+    def test_dots_depend_on_vertex_size(self):
+        # Large vertices are never reduced to dots, whatever the scale
+        self.assertFalse(self.policy.level(0.1, 1, 100 * 0.1).vertex_dots)
+        self.assertTrue(self.policy.level(0.1, 1, 4).vertex_dots)
+        self.assertFalse(self.policy.level(0.1, 1, None).vertex_dots)
+
+    def test_edges_depend_on_scale(self):
+        level = self.policy.level(0.4, 15, 30)
+        self.assertFalse(level.arrows)
+        self.assertFalse(level.edge_shapes)
+
+
+class TestLevelOfDetail(unittest.TestCase):
+
+    def test_full_detail_has_no_options(self):
+        level = LevelOfDetail()
+        for kind in ("vertex", "edge"):
+            for part in ("shape", "label", "arrow"):
+                self.assertEqual(level.options(kind, part), {})
+
+    def test_undrawn_parts_are_hidden(self):
+        level = LevelOfDetail(labels=False, edge_shapes=False)
+        self.assertEqual(level.options("vertex", "label"),
+                         {"state": "hidden"})
+        self.assertEqual(level.options("edge", "shape"), {"state": "hidden"})
+
+    def test_dots_keep_items_active(self):
+        options = LevelOfDetail(vertex_dots=True,
+                                dot_color="red").options("vertex", "shape")
+        self.assertEqual(options, {"fill": "red", "outline": "red"})
+        self.assertNotIn("state", options)
+
+
+if __name__ == "__main__":
+    unittest.main()
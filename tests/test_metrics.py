@@ -0,0 +1,157 @@
+"""
+Tests of the layout metrics.
+"""
+
+import itertools
+import math
+import random
+import unittest
+
+from tkCanvasGraph.metrics import (IntervalTree, crossings, overlaps,
+                                   stress, edge_length_variance,
+                                   angular_resolution, measure)
+from tkCanvasGraph.metrics import _segment_intersection
+
+
+def brute_force_crossings(positions, links):
+    """
+    Return the number of crossings between links, checking all pairs.
+    """
+    segments = [(origin, end) for origin, end in links if origin != end]
+    count = 0
+    for (o1, e1), (o2, e2) in itertools.combinations(segments, 2):
+        if o1 in (o2, e2) or e1 in (o2, e2):
+            continue
+        if _segment_intersection(positions[o1], positions[e1],
+                                 positions[o2], positions[e2]) is not None:
+            count += 1
+    return count
+
+
+def brute_force_overlaps(boxes):
+    """
+    Return the number of pairs of overlapping boxes, checking all pairs.
+    """
+    count = 0
+    for (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) in \
+            itertools.combinations(boxes.values(), 2):
+        if ax0 < bx1 and bx0 < ax1 and ay0 < by1 and by0 < ay1:
+            count += 1
+    return count
+
+
+class TestIntervalTree(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(IntervalTree([]).overlapping(0, 10), [])
+
+    def test_touching_intervals_do_not_overlap(self):
+        tree = IntervalTree([(0, 5, "a"), (10, 15, "b")])
+        self.assertEqual(tree.overlapping(5, 10), [])
+        self.assertEqual(sorted(tree.overlapping(4, 11)), ["a", "b"])
+
+    def test_against_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            intervals = []
+            for value in range(rng.randint(1, 60)):
+                low = rng.randint(0, 100)
+                intervals.append((low, low + rng.randint(0, 30), value))
+            tree = IntervalTree(intervals)
+            for _ in range(20):
+                low = rng.randint(-10, 120)
+                high = low + rng.randint(0, 40)
+                expected = sorted(value for ilow, ihigh, value in intervals
+                                  if ilow < high and low < ihigh)
+                self.assertEqual(sorted(tree.overlapping(low, high)),
+                                 expected)
+
+
+class TestCrossings(unittest.TestCase):
+
+    def test_cross(self):
+        positions = {"a": (0, 0), "b": (10, 10), "c": (0, 10), "d": (10, 0)}
+        self.assertEqual(crossings(positions, {("a", "b"), ("c", "d")}), 1)
+
+    def test_shared_element_never_crosses(self):
+        positions = {"a": (0, 0), "b": (10, 10), "c": (10, 0)}
+        self.assertEqual(crossings(positions, {("a", "b"), ("a", "c")}), 0)
+
+    def test_parallel_links(self):
+        positions = {"a": (0, 0), "b": (10, 0), "c": (0, 5), "d": (10, 5)}
+        self.assertEqual(crossings(positions, {("a", "b"), ("c", "d")}), 0)
+
+    def test_against_brute_force(self):
+        rng = random.Random(2)
+        for _ in range(20):
+            positions = {index: (rng.uniform(0, 100), rng.uniform(0, 100))
+                         for index in range(30)}
+            links = {(rng.randrange(30), rng.randrange(30))
+                     for _ in range(40)}
+            self.assertEqual(crossings(positions, links),
+                             brute_force_crossings(positions, links))
+
+
+class TestOverlaps(unittest.TestCase):
+
+    def test_touching_boxes_do_not_overlap(self):
+        boxes = {"a": (0, 0, 10, 10), "b": (10, 0, 20, 10),
+                 "c": (0, 10, 10, 20)}
+        self.assertEqual(overlaps(boxes), 0)
+
+    def test_against_brute_force(self):
+        rng = random.Random(3)
+        for _ in range(20):
+            boxes = {}
+            for index in range(40):
+                x, y = rng.uniform(0, 100), rng.uniform(0, 100)
+                boxes[index] = (x, y, x + rng.uniform(0, 20),
+                                y + rng.uniform(0, 20))
+            self.assertEqual(overlaps(boxes), brute_force_overlaps(boxes))
+
+
+class TestMeasures(unittest.TestCase):
+
+    def setUp(self):
+        # A path a - b - c laid out on a line, with unit spacing
+        self.positions = {"a": (0, 0), "b": (1, 0), "c": (2, 0)}
+        self.links = {("a", "b"), ("b", "c")}
+
+    def test_stress_of_perfect_layout(self):
+        self.assertAlmostEqual(stress(self.positions, self.links), 0)
+
+    def test_stress_is_scale_invariant(self):
+        self.positions["c"] = (1, 1)
+        scaled = {element: (3 * x, 3 * y)
+                  for element, (x, y) in self.positions.items()}
+        self.assertGreater(stress(self.positions, self.links), 0)
+        self.assertAlmostEqual(stress(scaled, self.links),
+                               stress(self.positions, self.links))
+
+    def test_edge_length_variance(self):
+        self.assertEqual(edge_length_variance(self.positions, self.links), 0)
+        self.positions["c"] = (4, 0)
+        # Lengths 1 and 3: variance 1, mean 2
+        self.assertAlmostEqual(
+            edge_length_variance(self.positions, self.links), 0.25)
+
+    def test_angular_resolution(self):
+        self.assertAlmostEqual(
+            angular_resolution(self.positions, self.links), math.pi)
+        self.positions["c"] = (1, 1)
+        self.assertAlmostEqual(
+            angular_resolution(self.positions, self.links), math.pi / 2)
+
+    def test_measure_samples_stress_sources(self):
+        boxes = {index: (index, 0, index + 1, 1) for index in range(100)}
+        links = {(index, index + 1) for index in range(99)}
+        sampled = measure(boxes=boxes, links=links, samples=10)
+        full = measure(boxes=boxes, links=links, samples=None)
+        self.assertEqual(sampled["crossings"], 0)
+        self.assertEqual(sampled["overlaps"], 0)
+        self.assertAlmostEqual(sampled["stress"], 0)
+        self.assertAlmostEqual(full["stress"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
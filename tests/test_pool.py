@@ -0,0 +1,108 @@
+"""
+Tests of canvas item pools.
+"""
+
+import unittest
+
+from tkCanvasGraph.pool import ItemPool
+
+
+class RecordingCanvas:
+    """
+    A stand-in for a canvas, keeping the options of its items.
+    """
+
+    DEFAULTS = {"fill": "", "outline": "black", "width": "1.0",
+                "state": "", "tags": ""}
+
+    def __init__(self):
+        self.items = {}
+        self.queries = 0
+
+    def create(self, **options):
+        handle = len(self.items) + 1
+        self.items[handle] = {"coords": (), "options": dict(self.DEFAULTS)}
+        self.items[handle]["options"].update(options)
+        return handle
+
+    def coords(self, handle, *coords):
+        self.items[handle]["coords"] = coords
+
+    def itemconfigure(self, handle, **options):
+        if not options:
+            self.queries += 1
+            return {name: (name, "", "", default,
+                           self.items[handle]["options"][name])
+                    for name, default in self.DEFAULTS.items()}
+        self.items[handle]["options"].update(options)
+
+    def delete(self, *handles):
+        for handle in handles:
+            del self.items[handle]
+
+
+class TestItemPool(unittest.TestCase):
+
+    def setUp(self):
+        self.canvas = RecordingCanvas()
+        self.pool = ItemPool(self.canvas, max_size=2)
+
+    def test_acquire_from_empty_pool(self):
+        self.assertIsNone(self.pool.acquire("oval", (0, 0, 1, 1), {}))
+
+    def test_release_hides_item(self):
+        handle = self.canvas.create(fill="red", tags="vertex")
+        self.assertTrue(self.pool.release(handle, "oval", {"fill", "tags"}))
+        self.assertEqual(len(self.pool), 1)
+        options = self.canvas.items[handle]["options"]
+        self.assertEqual(options["state"], "hidden")
+        self.assertEqual(options["tags"], "")
+
+    def test_acquire_resets_options(self):
+        handle = self.canvas.create(fill="red", width="3.0")
+        self.pool.release(handle, "oval", {"fill", "width"})
+        acquired = self.pool.acquire("oval", (1, 2, 3, 4),
+                                     {"width": "2.0", "tags": "edge"})
+        self.assertEqual(acquired, handle)
+        self.assertEqual(len(self.pool), 0)
+        item = self.canvas.items[handle]
+        self.assertEqual(item["coords"], (1, 2, 3, 4))
+        self.assertEqual(item["options"],
+                         {"fill": "", "outline": "black", "width": "2.0",
+                          "state": "", "tags": "edge"})
+
+    def test_pool_by_type(self):
+        handle = self.canvas.create()
+        self.pool.release(handle, "oval", ())
+        self.assertIsNone(self.pool.acquire("line", (0, 0, 1, 1), {}))
+        self.assertEqual(self.pool.acquire("oval", (0, 0, 1, 1), {}), handle)
+
+    def test_defaults_queried_once_per_type(self):
+        for _ in range(2):
+            self.pool.release(self.canvas.create(), "oval", ())
+        self.assertEqual(self.canvas.queries, 1)
+
+    def test_full_pool(self):
+        handles = [self.canvas.create() for _ in range(3)]
+        self.assertTrue(self.pool.release(handles[0], "oval", ()))
+        self.assertTrue(self.pool.release(handles[1], "oval", ()))
+        self.assertFalse(self.pool.release(handles[2], "oval", ()))
+        self.assertEqual(len(self.pool), 2)
+        # A rejected item is left untouched, to be deleted by the caller
+        self.assertEqual(self.canvas.items[handles[2]]["options"]["state"],
+                         "")
+
+    def test_trim(self):
+        for item_type in ("oval", "line"):
+            for _ in range(2):
+                self.pool.release(self.canvas.create(), item_type, ())
+        self.pool.trim(1)
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(len(self.canvas.items), 2)
+        self.pool.trim()
+        self.assertEqual(len(self.pool), 0)
+        self.assertEqual(self.canvas.items, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
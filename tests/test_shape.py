@@ -0,0 +1,91 @@
+"""
+Tests of shapes.
+"""
+
+import random
+import unittest
+
+from tkCanvasGraph import shape
+from tkCanvasGraph.shape import Oval, Rectangle
+
+
+def random_cases(rng, count):
+    """
+    Return count random (bbox, end) cases, including ends vertically or
+    horizontally aligned with the center of the bounding box, and ends at
+    the center.
+    """
+    bboxes, ends = [], []
+    for index in range(count):
+        x0, y0 = rng.uniform(-100, 100), rng.uniform(-100, 100)
+        # Integral sizes give exactly representable centers
+        x1, y1 = x0 + rng.randint(1, 60), y0 + rng.randint(1, 60)
+        xc, yc = (x1 + x0) / 2, (y1 + y0) / 2
+        x, y = rng.uniform(-200, 200), rng.uniform(-200, 200)
+        kind = index % 4
+        if kind == 1:
+            x = xc
+        elif kind == 2:
+            y = yc
+        elif kind == 3 and index % 8 == 3:
+            x, y = xc, yc
+        bboxes.append((x0, y0, x1, y1))
+        ends.append((x, y))
+    return bboxes, ends
+
+
+@unittest.skipIf(shape.numpy is None, "NumPy is not available")
+class TestBatchIntersections(unittest.TestCase):
+    """
+    The batch intersections computed with NumPy must match the ones
+    computed one by one.
+    """
+
+    def check(self, shape_):
+        rng = random.Random(6)
+        bboxes, ends = random_cases(rng, 2000)
+        self.assertGreaterEqual(len(bboxes), shape._NUMPY_THRESHOLD)
+        points = shape_.intersections(bboxes, ends)
+        self.assertEqual(len(points), len(bboxes))
+        for bbox, end, point in zip(bboxes, ends, points):
+            expected = shape_.intersection(bbox, end)
+            message = "bbox {}, end {}".format(bbox, end)
+            self.assertAlmostEqual(point[0], expected[0], places=9,
+                                   msg=message)
+            self.assertAlmostEqual(point[1], expected[1], places=9,
+                                   msg=message)
+
+    def test_oval(self):
+        self.check(Oval())
+
+    def test_rectangle(self):
+        self.check(Rectangle())
+
+
+class TestIntersections(unittest.TestCase):
+
+    def test_few_intersections(self):
+        bboxes = [(0, 0, 10, 20), (0, 0, 10, 20)]
+        ends = [(5, 100), (100, 10)]
+        for shape_ in (Oval(), Rectangle()):
+            self.assertEqual(shape_.intersections(bboxes, ends),
+                             [shape_.intersection(bbox, end)
+                              for bbox, end in zip(bboxes, ends)])
+
+    def test_rectangle(self):
+        rectangle = Rectangle()
+        self.assertEqual(rectangle.intersection((0, 0, 10, 20), (5, 100)),
+                         (5, 20))
+        self.assertEqual(rectangle.intersection((0, 0, 10, 20), (-50, 10)),
+                         (0, 10))
+
+    def test_oval(self):
+        oval = Oval()
+        self.assertEqual(oval.intersection((0, 0, 10, 20), (100, 10)),
+                         (10, 10))
+        self.assertEqual(oval.intersection((0, 0, 10, 20), (5, -100)),
+                         (5, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+"""
+Tests of the utility structures.
+"""
+
+import random
+import tkinter as tk
+import unittest
+
+from tkCanvasGraph.util import (SpatialIndex, BoundsTracker, LRUCache,
+                                tcl_quote, CommandBatch)
+
+
+def random_bbox(rng, extent=1000, size=100):
+    """
+    Return a random (x0, y0, x1, y1) bounding box.
+    """
+    x, y = rng.uniform(-extent, extent), rng.uniform(-extent, extent)
+    return x, y, x + rng.uniform(0, size), y + rng.uniform(0, size)
+
+
+def intersecting(boxes, region):
+    """
+    Return the keys of boxes whose bounding box intersects region.
+    """
+    x0, y0, x1, y1 = region
+    return {key for key, (kx0, ky0, kx1, ky1) in boxes.items()
+            if kx0 <= x1 and x0 <= kx1 and ky0 <= y1 and y0 <= ky1}
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def test_insert_query_remove(self):
+        index = SpatialIndex(cell_size=10)
+        index.insert("a", (0, 0, 5, 5))
+        index.insert("b", (20, 20, 25, 25))
+        self.assertIn("a", index)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.bbox("a"), (0, 0, 5, 5))
+        self.assertEqual(index.query((4, 4, 21, 21)), {"a", "b"})
+        self.assertEqual(index.query((6, 6, 19, 19)), set())
+        index.remove("a")
+        self.assertNotIn("a", index)
+        self.assertEqual(index.query((0, 0, 30, 30)), {"b"})
+        # Removing an absent key is a no-op
+        index.remove("a")
+        self.assertEqual(len(index), 1)
+
+    def test_reinsert_moves_key(self):
+        index = SpatialIndex(cell_size=10)
+        index.insert("a", (0, 0, 5, 5))
+        index.insert("a", (100, 100, 105, 105))
+        self.assertEqual(index.query((0, 0, 10, 10)), set())
+        self.assertEqual(index.query((100, 100, 101, 101)), {"a"})
+        self.assertEqual(len(index), 1)
+
+    def test_large_boxes(self):
+        index = SpatialIndex(cell_size=10)
+        index.insert("large", (0, 0, 1000, 1000))
+        self.assertEqual(index.query((500, 500, 501, 501)), {"large"})
+        self.assertEqual(index.query((2000, 2000, 2001, 2001)), set())
+        index.remove("large")
+        self.assertEqual(index.query((500, 500, 501, 501)), set())
+
+    def test_against_brute_force(self):
+        rng = random.Random(4)
+        index = SpatialIndex(cell_size=64)
+        boxes = {}
+        for step in range(2000):
+            key = rng.randrange(200)
+            if rng.random() < 0.3:
+                index.remove(key)
+                boxes.pop(key, None)
+            else:
+                # Some boxes span more than MAX_CELLS cells
+                bbox = random_bbox(rng, size=rng.choice((20, 100, 1000)))
+                index.insert(key, bbox)
+                boxes[key] = bbox
+            if step % 20 == 0:
+                region = random_bbox(rng, size=rng.choice((50, 500, 3000)))
+                self.assertEqual(index.query(region),
+                                 intersecting(boxes, region))
+        self.assertEqual(len(index), len(boxes))
+        self.assertEqual(index.query((-5000, -5000, 5000, 5000)),
+                         set(boxes))
+
+
+def union(boxes):
+    """
+    Return the bounding box of all boxes, or None if there are none.
+    """
+    if not boxes:
+        return None
+    return (min(box[0] for box in boxes.values()),
+            min(box[1] for box in boxes.values()),
+            max(box[2] for box in boxes.values()),
+            max(box[3] for box in boxes.values()))
+
+
+class TestBoundsTracker(unittest.TestCase):
+
+    def test_empty(self):
+        tracker = BoundsTracker()
+        self.assertIsNone(tracker.bounds())
+        tracker.update("a", (0, 0, 1, 1))
+        tracker.remove("a")
+        self.assertIsNone(tracker.bounds())
+
+    def test_grow(self):
+        tracker = BoundsTracker()
+        tracker.update("a", (0, 0, 10, 10))
+        tracker.update("b", (5, -5, 20, 5))
+        self.assertEqual(tracker.bounds(), (0, -5, 20, 10))
+        tracker.update("a", (-10, 0, 10, 30))
+        self.assertEqual(tracker.bounds(), (-10, -5, 20, 30))
+
+    def test_shrink_on_removal(self):
+        tracker = BoundsTracker()
+        tracker.update("a", (0, 0, 10, 10))
+        tracker.update("b", (100, 100, 110, 110))
+        tracker.remove("b")
+        self.assertEqual(tracker.bounds(), (0, 0, 10, 10))
+        self.assertNotIn("b", tracker)
+        # Removing an absent key is a no-op
+        tracker.remove("b")
+        self.assertEqual(tracker.bounds(), (0, 0, 10, 10))
+
+    def test_shrink_on_update(self):
+        tracker = BoundsTracker()
+        tracker.update("a", (0, 0, 10, 10))
+        tracker.update("b", (100, 100, 110, 110))
+        tracker.update("b", (5, 5, 8, 8))
+        self.assertEqual(tracker.bounds(), (0, 0, 10, 10))
+
+    def test_clear(self):
+        tracker = BoundsTracker()
+        tracker.update("a", (0, 0, 10, 10))
+        tracker.clear()
+        self.assertIsNone(tracker.bounds())
+        self.assertEqual(len(tracker), 0)
+
+    def test_against_brute_force(self):
+        rng = random.Random(5)
+        tracker = BoundsTracker()
+        boxes = {}
+        for step in range(2000):
+            key = rng.randrange(50)
+            if rng.random() < 0.3:
+                tracker.remove(key)
+                boxes.pop(key, None)
+            else:
+                bbox = random_bbox(rng)
+                tracker.update(key, bbox)
+                boxes[key] = bbox
+            # Bounds are also checked while outdated ones pile up
+            if step % 7 == 0:
+                self.assertEqual(tracker.bounds(), union(boxes))
+        self.assertEqual(len(tracker), len(boxes))
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        cache = LRUCache(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("a", 0), 0)
+        cache.put("a", 1)
+        self.assertIn("a", cache)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("a", 2)
+        self.assertEqual(cache.get("a"), 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        # Using a makes b the least recently used entry
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        # Updating c makes a the least recently used entry
+        cache.put("c", 4)
+        cache.put("d", 5)
+        self.assertNotIn("a", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.put("a", 1)
+        cache.clear()
+        self.assertNotIn("a", cache)
+        self.assertEqual(len(cache), 0)
+
+
+class TestTclQuote(unittest.TestCase):
+
+    def setUp(self):
+        self.tcl = tk.Tcl()
+
+    def roundtrip(self, value):
+        """
+        Return the Tcl list obtained by evaluating value quoted as words.
+        """
+        return self.tcl.eval("list " + tcl_quote(value))
+
+    def test_plain_word(self):
+        self.assertEqual(tcl_quote("oval"), "oval")
+        self.assertEqual(tcl_quote(12.5), "12.5")
+
+    def test_empty_word(self):
+        self.assertEqual(tcl_quote(""), "{}")
+        self.assertEqual(self.tcl.splitlist(self.roundtrip("")), ("",))
+
+    def test_special_characters(self):
+        for value in ["a b", "{", "}", "[exit]", "$x", '"q"', "a;b",
+                      "back\\slash", "tab\there", "new\nline", "cr\rhere",
+                      "{unbalanced"]:
+            with self.subTest(value=value):
+                self.assertEqual(self.tcl.splitlist(self.roundtrip(value)),
+                                 (value,))
+
+    def test_list(self):
+        words = self.roundtrip(("a b", "", "[c]", 1))
+        self.assertEqual(len(self.tcl.splitlist(words)), 1)
+        self.assertEqual(self.tcl.splitlist(self.tcl.splitlist(words)[0]),
+                         ("a b", "", "[c]", "1"))
+
+
+
+class TestCommandBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tcl = tk.Tcl()
+        self.batch = CommandBatch(self.tcl)
+
+    def test_commands_are_queued_until_outermost_exit(self):
+        with self.batch:
+            self.batch.add("set", "x", "a b")
+            with self.batch:
+                self.batch.add("append", "x", "[c]")
+            self.assertTrue(self.batch.active)
+            self.assertEqual(self.tcl.eval("info exists x"), "0")
+        self.assertFalse(self.batch.active)
+        self.assertEqual(self.tcl.getvar("x"), "a b[c]")
+
+    def test_expected_results(self):
+        with self.batch:
+            self.batch.add("set", "x", "{a}", expect="{a}")
+        self.assertEqual(self.tcl.getvar("x"), "{a}")
+        with self.assertRaises(tk.TclError):
+            with self.batch:
+                self.batch.add("set", "x", 2, expect=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -57,7 +57,6 @@ if __name__ == "__main__":
 
             def replace_label(*args):
                 element.label = label_var.get()
-                frame.canvas.refresh()
                 self.destroy()
 
             tk.Button(mainframe,
@@ -83,10 +82,10 @@ if __name__ == "__main__":
 
 
     # Add a transformer to give colors to element edges depending on their
-    # relative position
+    # relative position in the graph
     def rainbow(element, style):
-        bbox = frame.canvas.bbox("all")
-        if bbox:
+        bbox = frame.canvas.graph_bbox()
+        if bbox and bbox[2] > bbox[0]:
             xlu, ylu, xdr, ydr = bbox
             xc, yc = element.center
             # Color border from red to blue, depending on the relative
@@ -95,7 +94,7 @@ if __name__ == "__main__":
             blue = int(255 * (xdr - xc) / (xdr - xlu))
             style["shape_style"]["outline"] = "#%02x00%02x" % (red, blue)
             style["shape_style"]["width"] = 2
-    frame.canvas.register_transformer(rainbow)
+    frame.canvas.register_transformer(rainbow, depends=("position", "bounds"))
 
 
     # Add transformer that change the color outline of selected vertices and
@@ -103,7 +102,7 @@ if __name__ == "__main__":
     def selected_vertex(element, style):
         if element in frame.canvas.selected:
             style["shape_style"]["outline"] = "green"
-    frame.canvas.register_transformer(selected_vertex)
+    frame.canvas.register_transformer(selected_vertex, depends=("selection",))
 
 
     # Add keyboard bindings to apply one step of the force based layout,
@@ -123,8 +122,7 @@ if __name__ == "__main__":
                  for o in frame.canvas.vertices
                  for e in frame.canvas.vertices
                  if o != e
-                 if len([edge for edge in frame.canvas.edges
-                         if edge.origin == o and edge.end == e]) <= 0]
+                 if not frame.canvas.edges_between(o, e)]
         if len(pairs) > 0:
             o, e = random.choice(pairs)
             edge = Edge(frame.canvas, o, e)
@@ -0,0 +1,146 @@
+"""
+Animations.
+
+This module defines animated transitions of graph elements from their current
+position to new ones, such as the positions computed by a layout.
+"""
+
+import time
+
+from .graph import Edge
+
+
+__all__ = ["Transition"]
+
+
+def _smoothstep(progress):
+    """
+    Return the eased value of progress, starting and ending smoothly.
+
+    :param progress: the linear progress, between 0 and 1.
+    :return: the eased progress, between 0 and 1.
+    """
+    return progress * progress * (3 - 2 * progress)
+
+
+class Transition:
+    """
+    A transition moves graph elements from their current positions to new
+    ones over a fixed duration.
+
+    Frames are driven by the after() method of the canvas. The progress of
+    the transition only depends on the elapsed time: a slow frame makes the
+    next one skip ahead instead of slowing down the whole transition. Each
+    frame only moves the handles of the moving elements and redraws the
+    arrows of the edges attached to them.
+    """
+
+    def __init__(self, canvas, positions, duration=300, interval=16):
+        """
+        Create a new transition on canvas.
+
+        :param canvas: the canvas the elements are drawn on;
+        :param positions: a dictionary of elements -> (x, y) positions to
+                          move to;
+        :param duration: the duration of the transition, in milliseconds;
+        :param interval: the targeted interval between two frames, in
+                         milliseconds.
+        """
+        self.canvas = canvas
+        self.duration = duration
+        self.interval = interval
+
+        # Only keep elements that actually move
+        self._paths = {}
+        for element, (x, y) in positions.items():
+            xs, ys = element.center
+            if (xs, ys) != (x, y):
+                self._paths[element] = (xs, ys, x - xs, y - ys)
+
+        # Edges whose arrows must follow the moving elements
+        self._edges = {edge for edge in self._paths if edge in canvas.edges}
+        for element in self._paths:
+            if element in canvas.vertices:
+                self._edges.update(canvas.edges_of(element))
+
+        self._start = None
+        self._after = None
+
+    @property
+    def running(self):
+        """
+        Whether this transition is running.
+        """
+        return self._start is not None
+
+    def start(self):
+        """
+        Start this transition. The first frame is drawn immediately.
+        """
+        self._start = time.monotonic()
+        self._frame()
+
+    def stop(self):
+        """
+        Stop this transition, moving the elements to their final position.
+        """
+        if not self.running:
+            return
+        if self._after is not None:
+            self.canvas.after_cancel(self._after)
+            self._after = None
+        self._draw(1)
+        self._start = None
+        self.canvas.invalidate(self._paths)
+        self.canvas.request_refresh()
+
+    def cancel(self):
+        """
+        Stop this transition, leaving the elements where they are.
+        """
+        if self._after is not None:
+            self.canvas.after_cancel(self._after)
+            self._after = None
+        self._start = None
+
+    def _draw(self, progress):
+        """
+        Move the elements at the given progress of their paths and redraw the
+        arrows of the concerned edges.
+
+        :param progress: the linear progress of the transition, between 0
+                         and 1.
+        """
+        eased = _smoothstep(progress)
+        canvas = self.canvas
+        with canvas.batch():
+            for element, (xs, ys, dx, dy) in self._paths.items():
+                if element not in canvas.vertices and \
+                        element not in canvas.edges:
+                    # The element has been deleted in the meantime
+                    continue
+                xc, yc = element.center
+                element._move_handles(xs + eased * dx - xc,
+                                      ys + eased * dy - yc)
+            Edge._refresh_all_arrows([edge for edge in self._edges
+                                      if edge._handle is not None])
+
+    def _frame(self):
+        """
+        Draw the frame corresponding to the current time and schedule the
+        next one, if any.
+        """
+        self._after = None
+        frame_start = time.monotonic()
+        elapsed = (frame_start - self._start) * 1000
+        if self.duration <= 0 or elapsed >= self.duration:
+            self.stop()
+            return
+
+        self._draw(elapsed / self.duration)
+
+        # Keep a steady frame rate: the cost of this frame is deducted from
+        # the delay before the next one
+        spent = (time.monotonic() - frame_start) * 1000
+        delay = max(1, int(self.interval - spent))
+        self._after = self.canvas.after(delay, self._frame)
@@ -6,18 +6,32 @@ can display graphs.
 """
 
 import tkinter as tk
+import tkinter.font as tkfont
 import random
+import re
 
-from .util import ObservableSet
+from .util import (ObservableSet, CommandBatch, SpatialIndex, LRUCache,
+                   BoundsTracker, CanvasToolTipManager)
+from .exception import CanvasGraphError
 from .mouse import (SelectingMouse, SelectionModifyingMouse,
                     MovingMouse, MouseEvent)
 from .layout import ForceBasedLayout, OneStepForceBasedLayout, DotLayout
 from .graph import Vertex, Edge
+from .animation import Transition
+from .lod import LevelOfDetail, LevelOfDetailPolicy
+from .pool import ItemPool
 
 
 __all__ = ["CanvasGraph", "InteractiveCanvasGraph", "CanvasFrame"]
 
 
+# The layers of items of elements, from bottom to top
+_LAYERS = ("arrow", "edge", "vertex", "label")
+
+# Valid names of style classes, safe in Tk tag expressions
+_STYLE_CLASS_NAME = re.compile(r"[\w.:-]+")
+
+
 class CanvasGraph(tk.Canvas):
     """
     A canvas graph is a TK canvas on which you can display graphs.
@@ -31,24 +45,110 @@ class CanvasGraph(tk.Canvas):
         """
         super(CanvasGraph, self).__init__(parent, **config)
 
+        # Canvas mutations queued during refreshes, and Python-side caches
+        # of item coordinates and bounding boxes, indexed by handles
+        self._batch = CommandBatch(self)
+        self._coords_cache = {}
+        self._bbox_cache = {}
+
+        # Types and option names of created items indexed by handles, names
+        # of options configured through tags, and the pool of hidden items
+        # reused instead of creating new ones
+        self._created_items = {}
+        self._tag_options = set()
+        self.item_pool = ItemPool(self)
+        # Tk numbers the items of a canvas in creation order: once an item
+        # has been created, the handles of the next ones are known in advance
+        # and they can be created in batches
+        self._next_handle = None
+
+        # Layers: each layer ends with a hidden marker item, and the items of
+        # the layer are inserted right below it; items not put in a layer,
+        # such as the selection rectangle of mouses, are overlays above all
+        # layers
+        self._layer_markers = {}
+        for layer in _LAYERS:
+            self._layer_markers[layer] = self.create_line(
+                0, 0, 0, 0, state=tk.HIDDEN, tags=("layer", "layer:" + layer))
+
         # Elements indexed by their handles
         self.handles = {}
 
         self.vertices = set()
         self.edges = set()
 
-        # Transformers
+        # Incidence index: edges indexed by their origin, by their end, and
+        # by their (origin, end) couple
+        self._outgoing = {}
+        self._incoming = {}
+        self._between = {}
+
+        # Elements to redraw at next refresh, and the pending refresh
+        self._dirty = set()
+        self._refresh_id = None
+
+        # Last options sent to Tk, indexed by handles
+        self._applied_styles = {}
+
+        # Style classes: the options of each class, by part, in order of
+        # definition, and the classes of elements
+        self._style_classes = {}
+        self._element_classes = {}
+
+        # Transformers, with their declared dependencies if any
         self.transformers = []
+        self._transformer_dependencies = {}
+        # The inputs the transformers depend on, None if some transformer
+        # must be applied at every refresh
+        self._transformer_inputs = (), ()
+        # The inputs of the last application of transformers on elements
+        self._transformer_keys = {}
 
         # Mouses indexed by their binding button
         self.mouses = {}
 
-        self.config(scrollregion=self.bbox("all"))
+        # Virtualized mode: only the elements intersecting the visible region
+        # extended by virtual_margin are drawn; the others are indexed by
+        # their extent
+        self._virtual = False
+        self.virtual_margin = 200
+        self._index = None
+        self._viewport_outdated = False
+        self.bind("<Configure>", lambda e: self._viewport_changed(), "+")
+
+        # Zoom scale of the canvas, 1 meaning no zoom, and level of detail
+        # chosen by lod_policy from it and the on-screen size of elements;
+        # no policy means full detail
+        self.zoom_scale = 1.0
+        # Font of the labels, scaled with the zoom
+        self._label_font = tkfont.Font(root=self, font="TkDefaultFont")
+        self._label_font_size = self._label_font.cget("size")
+
+        # Sizes of labels indexed by (text, font, justify), and fonts of
+        # label styles indexed by their description
+        self._label_sizes = LRUCache()
+        self._fonts = {}
+        self.lod_policy = LevelOfDetailPolicy()
+        self.level_of_detail = LevelOfDetail()
+
+        # Bounds of the elements and the padded scrollregion they give
+        self._bounds = BoundsTracker()
+        self._scrollregion = None
 
         # Layout variable to stop and start interactive layouts
         self.layouting = tk.BooleanVar()
         self.layouting.set(False)
         self.layout_interval = 25
+        self._layout_id = None
+
+        # Animated transitions of layouts, disabled if duration is 0
+        self.transition_duration = 0
+        self.transition_interval = 16
+        self._transition = None
+
+        # Tooltips of all elements, shown by a single manager
+        self.tooltips = CanvasToolTipManager(self, self._tooltip_of,
+                                             follow_mouse=1)
 
     def apply_layout(self, layout):
         """
@@ -56,10 +156,73 @@ class CanvasGraph(tk.Canvas):
 
         :param layout: the layout to apply, must comply with the apply method
                        (see layout.Layout).
+
+        If self.transition_duration is positive and the layout provides the
+        positions method, the elements are moved with an animated transition.
         """
         self.layouting.set(False)
-        layout.apply(self, self.vertices, self.edges)
-        self.refresh()
+        self._commit_layout(layout)
+
+    def _commit_layout(self, layout, fixed=None):
+        """
+        Apply the given layout on this canvas, with an animated transition
+        if enabled.
+
+        :param layout: the layout to apply;
+        :param fixed: a set of elements that must remain at given position.
+        """
+        self.stop_transition()
+        if self.transition_duration > 0 and hasattr(layout, "positions"):
+            try:
+                positions = layout.positions(self, self.vertices, self.edges,
+                                             fixed=fixed)
+            except NotImplementedError:
+                positions = None
+            if positions is not None:
+                self.transition_to(positions)
+                return
+        layout.apply(self, self.vertices, self.edges, fixed=fixed)
+        self.request_refresh()
+
+    def transition_to(self, positions):
+        """
+        Move the given elements to their new positions with an animated
+        transition lasting self.transition_duration milliseconds.
+
+        :param positions: a dictionary of elements -> (x, y) positions.
+
+        Any running transition is stopped first.
+        """
+        self.stop_transition()
+        self._transition = Transition(self, positions,
+                                      duration=self.transition_duration,
+                                      interval=self.transition_interval)
+        self._transition.start()
+
+    def stop_transition(self):
+        """
+        Stop the running transition, if any, moving its elements to their
+        final position.
+        """
+        if self._transition is not None:
+            transition = self._transition
+            self._transition = None
+            transition.stop()
+
+    def _schedule_layout_step(self, step):
+        """
+        Schedule the given step of an interactive layout after
+        self.layout_interval milliseconds, replacing the pending one if any.
+
+        :param step: the function applying one step of the layout.
+        """
+        if self._layout_id is not None:
+            self.after_cancel(self._layout_id)
+
+        def run():
+            self._layout_id = None
+            step()
+        self._layout_id = self.after(self.layout_interval, run)
 
     def apply_interactive_layout(self, layout):
         """
@@ -78,14 +241,15 @@ class CanvasGraph(tk.Canvas):
                 return
 
             layout.apply(self, self.vertices, self.edges)
-            self.refresh()
+            self.request_refresh()
 
             if self.layouting.get():
-                self.after(self.layout_interval, iter_layout)
+                self._schedule_layout_step(iter_layout)
 
+        self.stop_transition()
         if not self.layouting.get():
             self.layouting.set(True)
-        self.after(self.layout_interval, iter_layout)
+        self._schedule_layout_step(iter_layout)
 
     def _current_element(self):
         """
@@ -114,6 +278,88 @@ class CanvasGraph(tk.Canvas):
         else:
             return None
 
+    def bind_vertices(self, event, callback, add=None):
+        """
+        Add an event binding to all vertices of this canvas.
+
+        :param event: the event specifier;
+        :param callback: the function to call when the event occurs on a
+                         vertex, taking two arguments: the event and the
+                         vertex;
+        :param add: if not None and set to "+", the new binding is added to any
+                    existing binding.
+        :return: the identifier of the binding.
+
+        A single binding is installed for all vertices, including the ones
+        added later.
+        """
+        return self._bind_kind("vertex", event, callback, add)
+
+    def bind_edges(self, event, callback, add=None):
+        """
+        Add an event binding to all edges of this canvas.
+
+        :param event: the event specifier;
+        :param callback: the function to call when the event occurs on an
+                         edge, taking two arguments: the event and the edge;
+        :param add: if not None and set to "+", the new binding is added to any
+                    existing binding.
+        :return: the identifier of the binding.
+
+        A single binding is installed for all edges, including the ones added
+        later.
+        """
+        return self._bind_kind("edge", event, callback, add)
+
+    def unbind_vertices(self, event, funcid=None):
+        """
+        Remove the bindings for event of all vertices of this canvas.
+
+        :param event: the event specifier to remove the bindings on;
+        :param funcid: if not None, the identifier of the only binding to
+                       remove.
+        """
+        self.tag_unbind("vertex", event, funcid)
+
+    def unbind_edges(self, event, funcid=None):
+        """
+        Remove the bindings for event of all edges of this canvas.
+
+        :param event: the event specifier to remove the bindings on;
+        :param funcid: if not None, the identifier of the only binding to
+                       remove.
+        """
+        self.tag_unbind("edge", event, funcid)
+
+    def _bind_kind(self, kind, event, callback, add):
+        """
+        Bind event on the items of all elements of the given kind, calling
+        callback with the element of the current item.
+
+        :param kind: the kind of elements, "vertex" or "edge";
+        :param event: the event specifier;
+        :param callback: the function to call with the event and the element;
+        :param add: if not None and set to "+", the new binding is added to any
+                    existing binding.
+        :return: the identifier of the binding.
+        """
+        def dispatch(event):
+            element = self._current_element()
+            if element is not None:
+                return callback(event, element)
+        return self.tag_bind(kind, event, dispatch, add)
+
+    def _tooltip_of(self, handle):
+        """
+        Return the tooltip of the element attached to the given handle, if
+        any; None otherwise.
+
+        :param handle: the handle under the mouse pointer.
+        :return: the tooltip text of the element of handle, or None.
+        """
+        element = self.element_by_handle(handle)
+        return element.tooltip if element is not None else None
+
     def _add_element(self, element, position=None):
         """
         Add the given element on this canvas at position, if specified.
@@ -128,20 +374,80 @@ class CanvasGraph(tk.Canvas):
         # The vertex is added at random in the scroll region, if it is
         # large enough.
         if position is None:
-            if self.bbox("all") is None:
-                position = 0, 0
-            else:
-                x0, y0, x1, y1 = self.bbox("all")
-                dx = x1 - x0 if x1 - x0 > 100 else 100
-                dy = y1 - y0 if y1 - y0 > 100 else 100
-                x, y = random.randint(0, dx), random.randint(0, dy)
-                position = x0 + x, y0 + y
+            position = self._random_position(self.graph_bbox())
+        self._place_element(element, position)
+        self._update_scrollregion()
+        self.request_refresh()
 
-        element.draw(*position)
-        for handle in element.handles:
-            self.handles[handle] = element
+    def _add_elements(self, elements, positions):
+        """
+        Add the given elements on this canvas at once, each at its position.
+
+        :param elements: the list of elements to add and draw;
+        :param positions: the list of positions of the elements, None
+                          positions being chosen at random in the frame
+                          defined by the elements existing before the call.
+
+        The items of the elements are created in one batch, and the
+        scrollregion is updated once.
+        """
+        bbox = None
+        if None in positions:
+            bbox = self.graph_bbox()
+        region = self._viewport() if self._virtual else None
+        with self._batch:
+            for element, position in zip(elements, positions):
+                if position is None:
+                    position = self._random_position(bbox)
+                self._place_element(element, position, region)
         self._update_scrollregion()
-        self.refresh()
+        self.request_refresh()
+
+    @staticmethod
+    def _random_position(bbox):
+        """
+        Return a random position in bbox, or in the (0,0), (100, 100)
+        rectangle if bbox is smaller.
+
+        :param bbox: the bounding box of the existing elements, None if
+                     there are none.
+        :return: an x,y tuple.
+        """
+        if bbox is None:
+            return 0, 0
+        x0, y0, x1, y1 = bbox
+        dx = x1 - x0 if x1 - x0 > 100 else 100
+        dy = y1 - y0 if y1 - y0 > 100 else 100
+        x, y = random.randint(0, int(dx)), random.randint(0, int(dy))
+        return x0 + x, y0 + y
+
+    def _place_element(self, element, position, region=None):
+        """
+        Place the given element at position, drawing it unless this canvas
+        is virtualized and the element is not visible.
+
+        :param element: the element to place;
+        :param position: an x,y tuple;
+        :param region: the visible region of this canvas, if virtualized; if
+                       None, it is computed.
+        """
+        if self._virtual:
+            # Only draw the element if visible; undrawn elements get the
+            # geometry they would be drawn with
+            x, y = position
+            element._geometry = tuple(self._shape_dimension(
+                element.shape, element._label_bbox(element.style, x, y)))
+            self._geometry_changed(element)
+            extent = self._extent(element)
+            self._index.insert(element, extent)
+            if region is None:
+                region = self._viewport()
+            if self._intersects(extent, region):
+                self._realize(element)
+        else:
+            element.draw(*position)
+            for handle in element.handles:
+                self.handles[handle] = element
 
     def add_vertex(self, vertex, position=None):
         """
@@ -171,6 +477,127 @@ class CanvasGraph(tk.Canvas):
             position = ((xo + xe) / 2, (yo + ye) / 2)
         self._add_element(edge, position)
         self.edges.add(edge)
+        self._index_edge(edge)
+
+    def add_vertices(self, vertices, positions=None):
+        """
+        Add the given vertices on this canvas at once.
+
+        :param vertices: the iterable of vertices to add and draw;
+        :param positions: if not None, a dictionary of vertices -> x,y tuples;
+                          vertices without position are set at random in the
+                          frame defined by the existing elements, as with
+                          add_vertex.
+
+        This is much faster than adding the vertices one by one.
+        """
+        vertices = list(vertices)
+        positions = positions or {}
+        self._add_elements(vertices,
+                           [positions.get(vertex) for vertex in vertices])
+        self.vertices.update(vertices)
+
+    def add_edges(self, edges, positions=None):
+        """
+        Add the given edges on this canvas at once. Their ends must be
+        already added.
+
+        :param edges: the iterable of edges to add and draw;
+        :param positions: if not None, a dictionary of edges -> x,y tuples;
+                          the label of edges without position is set at the
+                          middle position between their origin and end
+                          vertices.
+
+        This is much faster than adding the edges one by one.
+        """
+        edges = list(edges)
+        positions = positions or {}
+        middles = []
+        for edge in edges:
+            position = positions.get(edge)
+            if position is None:
+                xo, yo = edge.origin.center
+                xe, ye = edge.end.center
+                position = ((xo + xe) / 2, (yo + ye) / 2)
+            middles.append(position)
+        self._add_elements(edges, middles)
+        self.edges.update(edges)
+        for edge in edges:
+            self._index_edge(edge)
+
+    def _index_edge(self, edge):
+        """
+        Add the given edge to the incidence index.
+
+        :param edge: the edge to add.
+        """
+        self._outgoing.setdefault(edge.origin, set()).add(edge)
+        self._incoming.setdefault(edge.end, set()).add(edge)
+        self._between.setdefault((edge.origin, edge.end), set()).add(edge)
+
+    def _unindex_edge(self, edge):
+        """
+        Remove the given edge from the incidence index.
+
+        :param edge: the edge to remove.
+        """
+        for index, key in ((self._outgoing, edge.origin),
+                           (self._incoming, edge.end),
+                           (self._between, (edge.origin, edge.end))):
+            edges = index.get(key)
+            if edges is not None:
+                edges.discard(edge)
+                if not edges:
+                    del index[key]
+
+    def outgoing_edges(self, vertex):
+        """
+        Return the edges of this canvas starting from vertex.
+
+        :param vertex: the vertex.
+        :return: the set of edges whose origin is vertex.
+        """
+        return set(self._outgoing.get(vertex, ()))
+
+    def incoming_edges(self, vertex):
+        """
+        Return the edges of this canvas ending at vertex.
+
+        :param vertex: the vertex.
+        :return: the set of edges whose end is vertex.
+        """
+        return set(self._incoming.get(vertex, ()))
+
+    def edges_of(self, vertex):
+        """
+        Return the edges of this canvas attached to vertex.
+
+        :param vertex: the vertex.
+        :return: the set of edges whose origin or end is vertex.
+        """
+        return (self._outgoing.get(vertex, set()) |
+                self._incoming.get(vertex, set()))
+
+    def neighbors(self, vertex):
+        """
+        Return the neighbors of vertex on this canvas.
+
+        :param vertex: the vertex.
+        :return: the set of vertices linked to vertex by an edge, in any
+                 direction.
+        """
+        return ({edge.end for edge in self._outgoing.get(vertex, ())} |
+                {edge.origin for edge in self._incoming.get(vertex, ())})
+
+    def edges_between(self, origin, end):
+        """
+        Return the edges of this canvas from origin to end.
+
+        :param origin: the origin vertex;
+        :param end: the end vertex.
+        :return: the set of edges whose origin is origin and end is end.
+        """
+        return set(self._between.get((origin, end), ()))
 
     def delete_element(self, element):
         """
@@ -178,23 +605,89 @@ class CanvasGraph(tk.Canvas):
 
         :param element: the element to delete.
         """
+        self.delete_elements((element,))
 
-        # Remove edges if element is vertex
-        if isinstance(element, Vertex):
-            to_delete = {edge for edge in self.edges
-                         if edge.origin == element or edge.end == element}
-            for edge in to_delete:
-                self.delete_element(edge)
+    def delete_elements(self, elements):
+        """
+        Delete the given elements at once, as well as the edges attached to
+        the deleted vertices.
 
-        for handle in element.handles:
-            self._delete_handle(handle)
-        element.delete_handles()
+        :param elements: the iterable of elements to delete.
+        :return: the set of deleted elements, including attached edges.
+
+        All items of the elements are deleted with one canvas command.
+        """
+        elements = set(elements)
+
+        # Remove edges attached to vertices
+        vertices = {element for element in elements
+                    if isinstance(element, Vertex)}
+        for vertex in vertices:
+            elements.update(self.edges_of(vertex))
+
+        handles = [handle for element in elements
+                   for handle in element.handles]
+        self._recycle(handles)
+        for handle in handles:
+            self.handles.pop(handle, None)
+            self._applied_styles.pop(handle, None)
+
+        for element in elements:
+            for event in tuple(element._bound_events):
+                element.unbind(event)
+            self._element_classes.pop(element, None)
+            element.delete_handles()
+            element._geometry = None
+            self._bounds.remove(element)
+            if self._index is not None:
+                self._index.remove(element)
+            self._transformer_keys.pop(element, None)
+            if element in self.edges:
+                self._unindex_edge(element)
 
         # Discard from other sets
-        self.vertices.discard(element)
-        self.edges.discard(element)
+        self.vertices.difference_update(elements)
+        self.edges.difference_update(elements)
+        self._dirty.difference_update(elements)
 
-        self.refresh()
+        self._update_scrollregion()
+        self.request_refresh()
+        return elements
+
+    def clear(self):
+        """
+        Delete all elements of this canvas.
+
+        :return: the set of deleted elements.
+        """
+        elements = self.vertices | self.edges
+        self.delete("vertex", "edge")
+        for element in elements:
+            for handle in element.handles:
+                self._created_items.pop(handle, None)
+        self.handles.clear()
+        self._applied_styles.clear()
+
+        for element in elements:
+            for event in tuple(element._bound_events):
+                element.unbind(event)
+            element.delete_handles()
+            element._geometry = None
+        self._element_classes.clear()
+        self._bounds.clear()
+        if self._index is not None:
+            self._index = SpatialIndex(self._index.cell_size)
+        self._transformer_keys.clear()
+
+        self.vertices.clear()
+        self.edges.clear()
+        self._outgoing.clear()
+        self._incoming.clear()
+        self._between.clear()
+        self._dirty.clear()
+
+        self.request_refresh()
+        return elements
 
     def _delete_handle(self, handle):
         """
@@ -202,9 +695,638 @@ class CanvasGraph(tk.Canvas):
 
         :param handle: the handle to delete.
         """
-        self.delete(handle)
+        self._recycle((handle,))
         if handle in self.handles:
             del self.handles[handle]
+        self._applied_styles.pop(handle, None)
+
+    def _recycle(self, handles):
+        """
+        Put the given items of elements in the item pool, deleting the ones
+        the pool cannot hold, with a single batch of canvas commands.
+
+        :param handles: the handles of the items to recycle.
+        """
+        deleted = []
+        with self._batch:
+            for handle in handles:
+                self._forget_geometry(handle)
+                item_type, names = self._created_items.pop(handle, (None, ()))
+                names = (set(names) |
+                         set(self._applied_styles.pop(handle, ())) |
+                         self._tag_options)
+                if item_type is None or \
+                        not self.item_pool.release(handle, item_type, names):
+                    deleted.append(handle)
+            if deleted:
+                self.delete(*deleted)
+
+    def _configure_item(self, handle, options):
+        """
+        Configure the given handle with options, only sending to Tk the
+        options that differ from the last ones applied to the handle.
+
+        :param handle: the handle to configure;
+        :param options: a dictionary of tkinter canvas item options.
+        """
+        applied = self._applied_styles.setdefault(handle, {})
+        delta = {key: value for key, value in options.items()
+                 if key not in applied or applied[key] != value}
+        if delta:
+            self.itemconfig(handle, **delta)
+            applied.update(delta)
+
+    def _item_options(self, element, part):
+        """
+        Return the options to create an item of element with.
+
+        :param element: the element the item is part of;
+        :param part: the part of the element the item draws, "shape", "label"
+                     or "arrow".
+        :return: a dictionary of tkinter canvas item options, with the tags
+                 of the item, the zoomed font of labels and the options of the
+                 current level of detail.
+        """
+        options = {"tags": (element._kind, part, element.tag)}
+        if part == "label":
+            options["font"] = self._label_font
+        classes = self._element_classes.get(element)
+        if classes:
+            options["tags"] += tuple(self._style_class_tag(name)
+                                     for name in classes)
+        options.update(self._part_style(element, part, {}))
+        return options
+
+    def _insert_in_layer(self, handle, element, part):
+        """
+        Insert the given new item in the layer of its part, at the top of the
+        layer.
+
+        :param handle: the handle of the item;
+        :param element: the element the item is part of;
+        :param part: the part of the element the item draws, "shape", "label"
+                     or "arrow".
+
+        Labels are above vertex shapes, vertex shapes above edge shapes, and
+        edge shapes above arrows.
+        """
+        layer = element._kind if part == "shape" else part
+        self.tag_lower(handle, self._layer_markers[layer])
+
+    def _part_style(self, element, part, options):
+        """
+        Return the options of the given part of element, overridden by the
+        current level of detail, then by the style classes of element.
+
+        :param element: the element the part belongs to;
+        :param part: the part of the element, "shape", "label" or "arrow";
+        :param options: the options of the part given by the style of
+                        element.
+        :return: a dictionary of tkinter canvas item options.
+        """
+        level = self.level_of_detail.options(element._kind, part)
+        classes = self._element_classes.get(element)
+        if not level and not classes:
+            return options
+        options = dict(options, **level)
+        if not classes:
+            return options
+        for name, style_class in self._style_classes.items():
+            if name in classes:
+                options.update(style_class[part])
+        return options
+
+    @staticmethod
+    def _style_class_tag(name):
+        """
+        Return the tag of the items of the elements of the given style class.
+
+        :param name: the name of the style class.
+        :return: the tag of the style class.
+        """
+        return "style:" + name
+
+    def configure_style_class(self, name, shape_style=None, label_style=None,
+                              arrow_style=None):
+        """
+        Define or change the style class name.
+
+        :param name: the name of the style class;
+        :param shape_style: if not None, a dictionary of options overriding
+                            the shape style of the elements of the class;
+        :param label_style: if not None, a dictionary of options overriding
+                            the label style of the elements of the class;
+        :param arrow_style: if not None, a dictionary of options overriding
+                            the arrow style of the edges of the class.
+
+        The given options are added to the current ones of the class, and
+        applied to all its elements with one item configuration per part,
+        whatever the number of elements. When an element belongs to several
+        classes setting the same option, the class defined last wins.
+
+        Names are made of letters, digits, underscores, dots, colons and
+        dashes, as they are part of Tk tag expressions.
+        """
+        if not _STYLE_CLASS_NAME.fullmatch(name):
+            raise CanvasGraphError("Invalid style class name: " + repr(name))
+        style_class = self._style_classes.setdefault(
+            name, {"shape": {}, "label": {}, "arrow": {}})
+        for part, options in (("shape", shape_style), ("label", label_style),
+                              ("arrow", arrow_style)):
+            if options:
+                style_class[part].update(options)
+                self._apply_style_class(name, part, options)
+
+    def _apply_style_class(self, name, part, options, tags=None):
+        """
+        Apply the given options of part of the style class name to the items
+        of its elements, except for the options overridden by a class defined
+        after it.
+
+        :param name: the name of the style class;
+        :param part: the part of the elements, "shape", "label" or "arrow";
+        :param options: the options to apply;
+        :param tags: if not None, the tags of the only elements to apply the
+                     options to; otherwise, the options are applied to all
+                     elements of the class.
+        """
+        names = list(self._style_classes)
+        later = names[names.index(name) + 1:]
+        groups = {}
+        for key, value in options.items():
+            overriding = tuple(other for other in later
+                               if key in self._style_classes[other][part])
+            groups.setdefault(overriding, {})[key] = value
+        if tags is None:
+            tags = (self._style_class_tag(name),)
+        for overriding, group in groups.items():
+            exclusions = tuple("!" + self._style_class_tag(other)
+                               for other in overriding)
+            for tag in tags:
+                self.itemconfigure("&&".join((tag, part) + exclusions),
+                                   **group)
+
+    def add_to_style_class(self, name, elements):
+        """
+        Add the given elements to the style class name.
+
+        :param name: the name of the style class, already configured;
+        :param elements: the iterable of elements of this canvas to add.
+        """
+        if name not in self._style_classes:
+            raise CanvasGraphError("Unknown style class: " + name)
+        tag = self._style_class_tag(name)
+        added = []
+        with self.batch():
+            for element in elements:
+                classes = self._element_classes.setdefault(element, set())
+                if name in classes:
+                    continue
+                classes.add(name)
+                self._command("addtag", tag, "withtag", element.tag)
+                added.append(element.tag)
+                # The items will get the options of the class below
+                for part, handle in self._item_parts(element):
+                    self._applied_styles.setdefault(handle, {}).update(
+                        self._part_style(element, part, {}))
+            # Only the added elements are configured, not the whole class
+            for part, options in self._style_classes[name].items():
+                if options and added:
+                    self._apply_style_class(name, part, options, added)
+
+    def remove_from_style_class(self, name, elements):
+        """
+        Remove the given elements from the style class name.
+
+        :param name: the name of the style class;
+        :param elements: the iterable of elements of this canvas to remove.
+
+        The removed elements are redrawn at next refresh with their own
+        style.
+        """
+        if name not in self._style_classes:
+            return
+        tag = self._style_class_tag(name)
+        style_class = self._style_classes[name]
+        removed = []
+        with self.batch():
+            for element in elements:
+                classes = self._element_classes.get(element)
+                if classes is None or name not in classes:
+                    continue
+                classes.discard(name)
+                if not classes:
+                    del self._element_classes[element]
+                self._command("dtag", element.tag, tag)
+                # Forget the overridden options, for them to be sent again
+                for handle in element.handles:
+                    applied = self._applied_styles.get(handle, {})
+                    for options in style_class.values():
+                        for key in options:
+                            applied.pop(key, None)
+                removed.append(element)
+        self.invalidate(removed)
+        self.request_refresh()
+
+    @staticmethod
+    def _item_parts(element):
+        """
+        Return the parts of element drawn on canvas, with their handle.
+
+        :param element: the element.
+        :return: a list of (part, handle) couples.
+        """
+        parts = [("shape", element._handle), ("label", element._labelhandle),
+                 ("arrow", getattr(element, "_arrowhandle", None))]
+        return [(part, handle) for part, handle in parts if handle is not None]
+
+    def style_classes_of(self, element):
+        """
+        Return the names of the style classes of the given element.
+
+        :param element: an element of this canvas.
+        :return: the set of names of the style classes element belongs to.
+        """
+        return set(self._element_classes.get(element, ()))
+
+    def measure_label(self, text, font=None, justify=tk.CENTER):
+        """
+        Return the size of a label drawn on this canvas.
+
+        :param text: the text of the label, possibly with several lines;
+        :param font: the font of the label; if None, the label font of this
+                     canvas;
+        :param justify: the justification of the lines of the label.
+        :return: the (width, height) of the label, in pixels.
+
+        Labels are measured with font metrics, without drawing them, and
+        the measures are cached.
+        """
+        key = (text, None if font is None else str(font), justify)
+        size = self._label_sizes.get(key)
+        if size is None:
+            if font is None:
+                measuring_font = self._label_font
+            elif isinstance(font, tkfont.Font):
+                measuring_font = font
+            else:
+                measuring_font = self._fonts.get(key[1])
+                if measuring_font is None:
+                    measuring_font = tkfont.Font(root=self, font=font)
+                    self._fonts[key[1]] = measuring_font
+            lines = text.split("\n")
+            size = (max(measuring_font.measure(line) for line in lines),
+                    measuring_font.metrics("linespace") * len(lines))
+            self._label_sizes.put(key, size)
+        return size
+
+    def _shape_dimension(self, shape, bbox):
+        """
+        Return the dimension of shape around bbox at the zoom scale of this
+        canvas, such that the minimal sizes of shapes are zoomed too.
+
+        :param shape: the shape;
+        :param bbox: the (x0, y0, x1, y1) bounding box to draw around.
+        :return: the (x'0, y'0, x'1, y'1) bounding box of shape around bbox.
+        """
+        scale = self.zoom_scale
+        if scale == 1:
+            return shape.dimension(bbox)
+        x0, y0, x1, y1 = bbox
+        xc, yc = (x0 + x1) / 2, (y0 + y1) / 2
+        x0, y0, x1, y1 = shape.dimension((xc + (x0 - xc) / scale,
+                                          yc + (y0 - yc) / scale,
+                                          xc + (x1 - xc) / scale,
+                                          yc + (y1 - yc) / scale))
+        return (xc + (x0 - xc) * scale, yc + (y0 - yc) * scale,
+                xc + (x1 - xc) * scale, yc + (y1 - yc) * scale)
+
+    def zoom(self, factor, x=None, y=None):
+        """
+        Zoom this canvas by factor around the (x, y) point.
+
+        :param factor: the zoom factor, greater than 1 to zoom in;
+        :param x: the horizontal position to zoom around, in canvas
+                  coordinates; if None, the center of the visible region;
+        :param y: the vertical position to zoom around, in canvas
+                  coordinates; if None, the center of the visible region.
+
+        All items are scaled with one canvas command and the font of labels
+        is scaled accordingly; elements are neither redrawn nor re-measured.
+        Labels with their own font in their style are not scaled.
+        """
+        if factor <= 0:
+            raise CanvasGraphError("The zoom factor must be positive")
+        if x is None:
+            x = self.canvasx(self.winfo_width() / 2)
+        if y is None:
+            y = self.canvasy(self.winfo_height() / 2)
+        self.stop_transition()
+        self.zoom_scale *= factor
+
+        # The font is resized before scaling, which drops the cached bounding
+        # boxes
+        size = int(round(self._label_font_size * self.zoom_scale))
+        if size == 0:
+            size = 1 if self._label_font_size > 0 else -1
+        if size != self._label_font.cget("size"):
+            self._label_font.configure(size=size)
+            self._label_sizes.clear()
+        self.scale("all", x, y, factor, factor)
+
+        # Scale the geometry of undrawn elements and the spatial index
+        def scaled(bbox):
+            x0, y0, x1, y1 = bbox
+            return (x + (x0 - x) * factor, y + (y0 - y) * factor,
+                    x + (x1 - x) * factor, y + (y1 - y) * factor)
+
+        self._bounds.clear()
+        for element in self.vertices | self.edges:
+            if element._geometry is not None:
+                element._geometry = scaled(element._geometry)
+                self._bounds.update(element, element._geometry)
+        if self._index is not None:
+            index = SpatialIndex(self._index.cell_size)
+            for element in self.vertices | self.edges:
+                if element in self._index:
+                    index.insert(element, scaled(self._index.bbox(element)))
+            self._index = index
+
+        self.update_level_of_detail()
+        self._update_scrollregion()
+        self._viewport_changed()
+
+    def zoom_in(self, factor=1.25):
+        """
+        Zoom in by factor around the center of the visible region.
+
+        :param factor: the zoom factor, greater than 1.
+        """
+        self.zoom(factor)
+
+    def zoom_out(self, factor=1.25):
+        """
+        Zoom out by factor around the center of the visible region.
+
+        :param factor: the zoom factor, greater than 1.
+        """
+        self.zoom(1 / factor)
+
+    def fit_to_view(self, padding=10):
+        """
+        Zoom and scroll this canvas such that all elements are visible.
+
+        :param padding: the margin to leave around the elements, in pixels.
+        """
+        bbox = self.graph_bbox()
+        width, height = self.winfo_width(), self.winfo_height()
+        if bbox is None or width <= 2 * padding or height <= 2 * padding:
+            return
+        x0, y0, x1, y1 = bbox
+        xc, yc = (x0 + x1) / 2, (y0 + y1) / 2
+        self.zoom(min((width - 2 * padding) / max(x1 - x0, 1),
+                      (height - 2 * padding) / max(y1 - y0, 1)),
+                  xc, yc)
+
+        # Center the view on the elements
+        sx0, sy0, sx1, sy1 = self._scrollregion
+        self.xview_moveto((xc - width / 2 - sx0) / (sx1 - sx0))
+        self.yview_moveto((yc - height / 2 - sy0) / (sy1 - sy0))
+
+    def update_level_of_detail(self):
+        """
+        Choose the level of detail of this canvas from its zoom scale and the
+        on-screen size of its labels and vertices, and apply it if it
+        changed.
+
+        The level is applied to labels, edge shapes and arrows at once
+        through their tags; vertices are only redrawn if they switch from or
+        to dots.
+        """
+        if self.lod_policy is not None:
+            # Canvas coordinates are on-screen sizes, as the canvas is
+            # scaled when zooming
+            geometries = [vertex._geometry for vertex in self.vertices
+                          if vertex._geometry is not None]
+            sizes = [max(x1 - x0, y1 - y0)
+                     for x0, y0, x1, y1 in geometries]
+            level = self.lod_policy.level(
+                self.zoom_scale, self._label_font.metrics("linespace"),
+                max(sizes) if sizes else None)
+        else:
+            level = LevelOfDetail()
+        if level != self.level_of_detail:
+            previous = self.level_of_detail
+            self.level_of_detail = level
+            with self._batch:
+                level.apply(self)
+            if level.vertex_dots != previous.vertex_dots:
+                self.invalidate(self.vertices)
+                self.request_refresh()
+
+    def batch(self):
+        """
+        Return the batch of canvas commands of this canvas.
+
+        :return: a context manager; while inside it, item creations and
+                 coords, itemconfigure, move, scale, tag_raise, tag_lower and
+                 delete calls on this canvas are queued, and sent to Tk as a
+                 single script when the outermost context is left.
+
+        Any other canvas call flushes the queued commands first, except
+        reading the coordinates or the bounding box of a single handle,
+        answered from a Python-side cache when possible.
+        """
+        return self._batch
+
+    def _command(self, *words):
+        """
+        Run the given canvas command, or queue it if batching.
+
+        :param words: the words of the canvas command, after the canvas
+                      itself.
+        """
+        if self._batch.active:
+            self._batch.add(self._w, *words)
+        else:
+            self._batch.flush()
+            self.tk.call(self._w, *words)
+
+    def _forget_geometry(self, tag_or_id):
+        """
+        Forget the cached geometry of the items matching tag_or_id.
+
+        :param tag_or_id: a handle or a tag.
+        """
+        if isinstance(tag_or_id, int):
+            self._coords_cache.pop(tag_or_id, None)
+            self._bbox_cache.pop(tag_or_id, None)
+        else:
+            self._coords_cache.clear()
+            self._bbox_cache.clear()
+
+    def coords(self, *args):
+        if len(args) <= 1:
+            tag_or_id = args[0] if args else None
+            if isinstance(tag_or_id, int) and tag_or_id in self._coords_cache:
+                return list(self._coords_cache[tag_or_id])
+            self._batch.flush()
+            coords = super(CanvasGraph, self).coords(*args)
+            if isinstance(tag_or_id, int):
+                self._coords_cache[tag_or_id] = coords
+            return list(coords)
+
+        tag_or_id = args[0]
+        coords = []
+        for arg in args[1:]:
+            if isinstance(arg, (tuple, list)):
+                coords.extend(float(value) for value in arg)
+            else:
+                coords.append(float(arg))
+        if isinstance(tag_or_id, int):
+            # Keep the bounding box if the item did not change
+            if self._coords_cache.get(tag_or_id) != coords:
+                self._bbox_cache.pop(tag_or_id, None)
+            self._coords_cache[tag_or_id] = coords
+        else:
+            self._forget_geometry(tag_or_id)
+        self._command("coords", tag_or_id, *coords)
+
+    def bbox(self, *args):
+        if len(args) == 1 and isinstance(args[0], int):
+            handle = args[0]
+            if handle in self._bbox_cache:
+                return self._bbox_cache[handle]
+            self._batch.flush()
+            bbox = super(CanvasGraph, self).bbox(handle)
+            if bbox is not None:
+                self._bbox_cache[handle] = bbox
+            return bbox
+        self._batch.flush()
+        return super(CanvasGraph, self).bbox(*args)
+
+    def itemconfigure(self, tag_or_id, cnf=None, **kw):
+        if not cnf and not kw:
+            self._batch.flush()
+            return super(CanvasGraph, self).itemconfigure(tag_or_id)
+        if isinstance(cnf, str):
+            # Querying a single option
+            self._batch.flush()
+            return super(CanvasGraph, self).itemconfigure(tag_or_id, cnf)
+        # Pooled items must reset these options before being reused; the
+        # items in the pool, including the ones being released or reused,
+        # are not in _created_items
+        if isinstance(tag_or_id, int):
+            self._bbox_cache.pop(tag_or_id, None)
+            created = self._created_items.get(tag_or_id)
+            if created is not None:
+                created[1].update(cnf or (), kw)
+        else:
+            self._bbox_cache.clear()
+            self._tag_options.update(cnf or (), kw)
+        self._command("itemconfigure", tag_or_id, *self._options(cnf, kw))
+
+    itemconfig = itemconfigure
+
+    def move(self, tag_or_id, dx, dy):
+        if isinstance(tag_or_id, int):
+            coords = self._coords_cache.get(tag_or_id)
+            if coords is not None:
+                self._coords_cache[tag_or_id] = [
+                    value + (dy if index % 2 else dx)
+                    for index, value in enumerate(coords)]
+            bbox = self._bbox_cache.get(tag_or_id)
+            if bbox is not None:
+                x0, y0, x1, y1 = bbox
+                self._bbox_cache[tag_or_id] = (x0 + dx, y0 + dy,
+                                               x1 + dx, y1 + dy)
+        else:
+            self._forget_geometry(tag_or_id)
+        self._command("move", tag_or_id, dx, dy)
+
+    def scale(self, tag_or_id, x, y, xscale, yscale):
+        if tag_or_id == "all" or isinstance(tag_or_id, int):
+            # Scale the cached coordinates; bounding boxes do not scale
+            # exactly and are forgotten
+            if tag_or_id == "all":
+                handles = list(self._coords_cache)
+                self._bbox_cache.clear()
+            else:
+                handles = [tag_or_id] if tag_or_id in self._coords_cache else []
+                self._bbox_cache.pop(tag_or_id, None)
+            for handle in handles:
+                self._coords_cache[handle] = [
+                    (y + (value - y) * yscale) if index % 2
+                    else (x + (value - x) * xscale)
+                    for index, value in enumerate(self._coords_cache[handle])]
+        else:
+            self._forget_geometry(tag_or_id)
+        self._command("scale", tag_or_id, x, y, xscale, yscale)
+
+    def tag_raise(self, *args):
+        self._command("raise", *args)
+
+    lift = tag_raise
+
+    def tag_lower(self, *args):
+        self._command("lower", *args)
+
+    lower = tag_lower
+
+    def delete(self, *args):
+        for tag_or_id in args:
+            self._forget_geometry(tag_or_id)
+            self._created_items.pop(tag_or_id, None)
+        self._command("delete", *args)
+
+    def _create(self, item_type, args, kw):
+        coords = tk._flatten(args)
+        cnf = coords[-1] if coords else {}
+        if isinstance(cnf, (dict, tuple)):
+            coords = coords[:-1]
+        else:
+            cnf = {}
+        if isinstance(cnf, dict):
+            # Reuse a pooled item without leaving the batch; like new
+            # items, reused ones are on top
+            options = dict(cnf, **kw)
+            handle = self.item_pool.acquire(item_type, coords, options)
+            if handle is not None:
+                self.tag_raise(handle)
+                self._created_items[handle] = item_type, set(options)
+                return handle
+        else:
+            options = kw
+        if self._batch.active and self._next_handle is not None:
+            handle = self._next_handle
+            self._batch.add(self._w, "create", item_type,
+                            *(coords + self._options(cnf, kw)),
+                            expect=handle)
+        else:
+            self._batch.flush()
+            handle = super(CanvasGraph, self)._create(item_type, args, kw)
+        self._next_handle = handle + 1
+        self._created_items[handle] = item_type, set(options)
+        return handle
+
+    @classmethod
+    def _flush_before(cls, names):
+        """
+        Wrap the given canvas methods such that they flush the queued
+        commands before being called.
+
+        :param names: the names of the methods to wrap.
+        """
+        def flushing_closure(name):
+            def inner(self, *args, **kwargs):
+                self._batch.flush()
+                return getattr(super(cls, self), name)(*args, **kwargs)
+
+            inner.__name__ = name
+            setattr(cls, name, inner)
+
+        for name in names:
+            flushing_closure(name)
 
     def move_elements(self, elements, dx, dy):
         """
@@ -214,38 +1336,342 @@ class CanvasGraph(tk.Canvas):
         :param dx: the horizontal offset.
         :param dy: the vertical offset.
         """
-        for e in elements:
-            e.move(dx, dy)
-        for edge in self.edges:
-            if edge.origin in elements or edge.end in elements:
-                edge.refresh()
-        self.refresh()
+        with self._batch:
+            for e in elements:
+                e.move(dx, dy)
+        self.request_refresh()
 
         # Update scrollregion
         self._update_scrollregion()
 
+    def set_positions(self, positions, epsilon=0.5):
+        """
+        Move the given elements to their new positions at once.
+
+        :param positions: a dictionary of elements -> new (x, y) positions;
+        :param epsilon: elements moving by less than epsilon pixels on both
+                        axes are left in place.
+        :return: the set of moved elements.
+
+        The items of the elements are moved in one batch; the moved elements
+        and their edges are redrawn once, at next refresh.
+        """
+        moved = set()
+        with self._batch:
+            for element, (x, y) in positions.items():
+                xc, yc = element.center
+                dx, dy = x - xc, y - yc
+                if abs(dx) < epsilon and abs(dy) < epsilon:
+                    continue
+                element._move_handles(dx, dy)
+                moved.add(element)
+        if moved:
+            self.invalidate(moved)
+            self.request_refresh()
+        return moved
+
+    def _geometry_changed(self, element):
+        """
+        Note that the geometry of element changed.
+
+        :param element: the element whose geometry changed.
+        """
+        if element._geometry is None:
+            self._bounds.remove(element)
+        else:
+            self._bounds.update(element, element._geometry)
+
+    def graph_bbox(self):
+        """
+        Return the bounding box of all elements of this canvas, drawn or not,
+        or None if there are no elements.
+
+        The bounding box is maintained in Python, without querying Tk.
+        """
+        return self._bounds.bounds()
+
     def _update_scrollregion(self):
         """
-        Update the scrollregion of this canvas to match the drawn elements.
+        Update the scrollregion of this canvas to match the elements.
         """
         # Padding for scroll region
         PADDING = 10
-        bbox = self.bbox("all")
+        bbox = self.graph_bbox()
         if bbox is not None:
             minx, miny, maxx, maxy = bbox
-            self.config(scrollregion=(minx - PADDING, miny - PADDING,
-                                      maxx + PADDING, maxy + PADDING))
+            region = (minx - PADDING, miny - PADDING,
+                      maxx + PADDING, maxy + PADDING)
+            if region != self._scrollregion:
+                self._scrollregion = region
+                self.config(scrollregion=region)
+                # Transformers depending on the bounds must be applied again
+                # on all elements
+                inputs = self._transformer_inputs
+                if inputs is not None and "bounds" in inputs[0]:
+                    self.invalidate()
+                    self.request_refresh()
+
+    def invalidate(self, elements=None):
+        """
+        Mark the given elements as needing to be redrawn at next refresh.
+
+        :param elements: the iterable of elements to mark; if None, mark all
+                         elements of this canvas.
+
+        Elements are marked when their label changes, when they move or when
+        their selection state changes. Code changing the style of elements
+        directly must mark them itself.
+        """
+        if elements is None:
+            self._dirty.update(self.vertices)
+            self._dirty.update(self.edges)
+        else:
+            self._dirty.update(elements)
+
+    def request_refresh(self):
+        """
+        Request a refresh of this canvas. The refresh is performed when Tk is
+        idle, such that several requests made while handling an event lead to
+        a single refresh.
+        """
+        if self._refresh_id is None:
+            self._refresh_id = self.after_idle(self.refresh)
+
+    def flush(self):
+        """
+        Perform the requested refresh of this canvas now, if any.
+        """
+        if self._refresh_id is not None:
+            self.refresh()
+
+    def destroy(self):
+        # Pending callbacks would run on the destroyed canvas
+        for after_id in (self._refresh_id, self._layout_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self._refresh_id = None
+        self._layout_id = None
+        if self._transition is not None:
+            self._transition.cancel()
+            self._transition = None
+        self.tooltips.leave()
+        super(CanvasGraph, self).destroy()
 
     def refresh(self):
         """
-        Refresh all elements of this canvas.
+        Refresh the elements of this canvas marked as needing it, as well as
+        the edges attached to marked vertices.
+
+        Any requested refresh is performed by this call.
         """
-        for vertex in self.vertices:
-            vertex.refresh()
-        for edge in self.edges:
-            edge.refresh()
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+
+        dirty = self._dirty
+        if not dirty and not self._viewport_outdated:
+            return
+        self._dirty = set()
+
+        with self._batch:
+            self._refresh_elements(dirty)
         self._update_scrollregion()
 
+    def _refresh_elements(self, dirty):
+        """
+        Refresh the given elements, as well as the edges attached to given
+        vertices.
+
+        :param dirty: the set of elements to refresh.
+        """
+        vertices = {element for element in dirty if element in self.vertices}
+        edges = {element for element in dirty if element in self.edges}
+        for vertex in vertices:
+            edges.update(self.edges_of(vertex))
+
+        # Vertices first, as edges are drawn according to their ends
+        for vertex in vertices:
+            if vertex._handle is not None:
+                vertex.refresh()
+        drawn = [edge for edge in edges if edge._handle is not None]
+        for edge in drawn:
+            edge.refresh(arrows=False)
+        Edge._refresh_all_arrows(drawn)
+
+        if self._virtual:
+            self._update_viewport(vertices | edges)
+
+    @property
+    def virtual(self):
+        """
+        Whether this canvas is virtualized.
+
+        A virtualized canvas only draws the elements intersecting the visible
+        region of the canvas, extended by self.virtual_margin on each side.
+        Other elements keep their geometry in Python, and are drawn when
+        scrolling makes them visible. Bindings made on the handles of
+        elements are lost when their handles are released.
+        """
+        return self._virtual
+
+    @virtual.setter
+    def virtual(self, value):
+        value = bool(value)
+        if value == self._virtual:
+            return
+        self._virtual = value
+        if value:
+            self._index = SpatialIndex()
+            for element in self.vertices | self.edges:
+                self._index.insert(element, self._extent(element))
+            self._viewport_changed()
+        else:
+            self._index = None
+            # Vertices first, as edges are drawn according to their ends
+            with self._batch:
+                for element in list(self.vertices) + list(self.edges):
+                    if element._handle is None:
+                        self._realize(element)
+            self.request_refresh()
+
+    def _viewport_changed(self):
+        """
+        Note that the visible region of this canvas changed.
+        """
+        if self._virtual:
+            self._viewport_outdated = True
+            self.request_refresh()
+
+    def _viewport(self):
+        """
+        Return the visible region of this canvas, extended by
+        self.virtual_margin on each side.
+
+        :return: the (x0, y0, x1, y1) region, in canvas coordinates.
+        """
+        margin = self.virtual_margin
+        return (self.canvasx(0) - margin,
+                self.canvasy(0) - margin,
+                self.canvasx(self.winfo_width()) + margin,
+                self.canvasy(self.winfo_height()) + margin)
+
+    @staticmethod
+    def _intersects(bbox, region):
+        """
+        Return whether bbox intersects region.
+        """
+        x0, y0, x1, y1 = bbox
+        rx0, ry0, rx1, ry1 = region
+        return x0 <= rx1 and rx0 <= x1 and y0 <= ry1 and ry0 <= y1
+
+    def _extent(self, element):
+        """
+        Return the region covered by element; for edges, the region includes
+        the centers of their ends.
+
+        :param element: the element.
+        :return: the (x0, y0, x1, y1) region covered by element.
+        """
+        x0, y0, x1, y1 = element.bbox
+        if isinstance(element, Edge):
+            for x, y in (element.origin.center, element.end.center):
+                x0, y0, x1, y1 = min(x0, x), min(y0, y), max(x1, x), max(y1, y)
+        return x0, y0, x1, y1
+
+    def _update_viewport(self, elements):
+        """
+        Update the index of the given elements, then draw the elements
+        entering the visible region, and release the ones leaving it.
+
+        :param elements: the elements whose geometry may have changed.
+
+        If the visible region did not change, only the given elements are
+        checked.
+        """
+        index = self._index
+        for element in elements:
+            index.insert(element, self._extent(element))
+
+        region = self._viewport()
+        if self._viewport_outdated:
+            self._viewport_outdated = False
+            visible = index.query(region)
+            candidates = visible | set(self.handles.values())
+        else:
+            candidates = elements
+            visible = {element for element in elements
+                       if self._intersects(index.bbox(element), region)}
+
+        for element in candidates:
+            if element._handle is not None and element not in visible:
+                self._release(element)
+        # Vertices first, as edges are drawn according to their ends
+        entering = [element for element in visible
+                    if element._handle is None]
+        entering.sort(key=lambda element: isinstance(element, Edge))
+        for element in entering:
+            self._realize(element)
+
+    def _realize(self, element):
+        """
+        Draw the given placed element.
+
+        :param element: the element to draw.
+        """
+        x, y = element.center
+        element.draw(x, y)
+        for handle in element.handles:
+            self.handles[handle] = element
+
+        # Drawing may change the geometry of the element: update its extent
+        # and reroute the drawn edges attached to it
+        if self._index is not None:
+            self._index.insert(element, self._extent(element))
+        if isinstance(element, Vertex):
+            attached = [edge for edge in self.edges_of(element)
+                        if edge._handle is not None]
+            if attached:
+                self.invalidate(attached)
+                self.request_refresh()
+
+    def _release(self, element):
+        """
+        Delete the handles of the given element, keeping its geometry.
+
+        :param element: the element to release.
+        """
+        for handle in element.handles:
+            self._delete_handle(handle)
+        element.delete_handles()
+
+    def xview(self, *args):
+        result = super(CanvasGraph, self).xview(*args)
+        if args:
+            self._viewport_changed()
+        return result
+
+    def xview_moveto(self, fraction):
+        super(CanvasGraph, self).xview_moveto(fraction)
+        self._viewport_changed()
+
+    def xview_scroll(self, number, what):
+        super(CanvasGraph, self).xview_scroll(number, what)
+        self._viewport_changed()
+
+    def yview(self, *args):
+        result = super(CanvasGraph, self).yview(*args)
+        if args:
+            self._viewport_changed()
+        return result
+
+    def yview_moveto(self, fraction):
+        super(CanvasGraph, self).yview_moveto(fraction)
+        self._viewport_changed()
+
+    def yview_scroll(self, number, what):
+        super(CanvasGraph, self).yview_scroll(number, what)
+        self._viewport_changed()
+
     def _modifiers_from_string(self, modifiers):
         """
         Return the frozenset of modifiers defined by `modifiers`.
@@ -344,6 +1770,11 @@ class CanvasGraph(tk.Canvas):
 
         :param event: the pressing event.
         """
+        # Interacting with the graph ends any running transition
+        self.stop_transition()
+        # The bindings of mouses shadow the ones of the tooltips
+        self.tooltips.leave()
+
         button = event.num
         button = str(button)
         modifiers = self._modifiers_from_state(event.state)
@@ -357,7 +1788,7 @@ class CanvasGraph(tk.Canvas):
             for mouse in self.mouses[(button, modifiers)]:
                 if not mouse.pressed(event):
                     break
-        self.refresh()
+        self.request_refresh()
 
     def _moved(self, event):
         """
@@ -365,6 +1796,7 @@ class CanvasGraph(tk.Canvas):
 
         :param event: the moving event.
         """
+        self.tooltips.leave()
         button = self._mouse_button_from_state(event.state)
         button = str(button)
         modifiers = self._modifiers_from_state(event.state)
@@ -378,7 +1810,7 @@ class CanvasGraph(tk.Canvas):
             for mouse in self.mouses[(button, modifiers)]:
                 if not mouse.moved(event):
                     break
-        self.refresh()
+        self.request_refresh()
 
     def _released(self, event):
         """
@@ -399,15 +1831,27 @@ class CanvasGraph(tk.Canvas):
             for mouse in self.mouses[(button, modifiers)]:
                 if not mouse.released(event):
                     break
-        self.refresh()
+        self.request_refresh()
 
-    def register_transformer(self, transformer):
+    # The inputs transformers can depend on
+    TRANSFORMER_DEPENDENCIES = ("selection", "position", "label", "bounds")
+
+    def register_transformer(self, transformer, depends=None, version=None):
         """
         Register the given transformer.
         The transformer must be a function taking an element (vertex or edge)
         and a style as arguments and updating the style.
 
-        :param transformer: the transformer to register.
+        :param transformer: the transformer to register;
+        :param depends: if not None, an iterable of the inputs the
+                        transformer depends on, among "selection" (whether
+                        the element is selected), "position" (the center of
+                        the element), "label" (the label of the element) and
+                        "bounds" (the bounding box of the whole graph, see
+                        graph_bbox);
+        :param version: if not None, a function taking an element and
+                        returning a version key; the transformer depends on
+                        this key.
 
         The transformer has access to and can change:
 
@@ -424,10 +1868,25 @@ class CanvasGraph(tk.Canvas):
           The style of the shape should be a dictionary of valid tkinter canvas
           shape configurations.
 
-        The canvas is refreshed.
+        If neither depends nor version is given, the transformer is applied
+        every time an element is refreshed. Otherwise, the transformers are
+        only applied on an element when one of the inputs they depend on
+        changed since their last application; in the meantime, the element
+        keeps the style they produced.
+
+        A refresh of the canvas is requested.
         """
+        if depends is not None or version is not None:
+            depends = frozenset(depends or ())
+            unknown = depends - set(self.TRANSFORMER_DEPENDENCIES)
+            if unknown:
+                raise CanvasGraphError("Unknown transformer dependencies: " +
+                                       ", ".join(sorted(unknown)))
+            self._transformer_dependencies[transformer] = depends, version
         self.transformers.append(transformer)
-        self.refresh()
+        self._update_transformer_inputs()
+        self.invalidate()
+        self.request_refresh()
 
     def unregister_transformer(self, transformer):
         """
@@ -435,11 +1894,82 @@ class CanvasGraph(tk.Canvas):
 
         :param transformer: the transformer to unregister.
 
-        The canvas is refreshed.
+        A refresh of the canvas is requested.
         """
         while transformer in self.transformers:
             self.transformers.remove(transformer)
-        self.refresh()
+        self._transformer_dependencies.pop(transformer, None)
+        self._update_transformer_inputs()
+        self.invalidate()
+        self.request_refresh()
+
+    def _update_transformer_inputs(self):
+        """
+        Update the inputs the registered transformers depend on, and forget
+        the inputs of their last applications.
+        """
+        self._transformer_keys = {}
+        if any(transformer not in self._transformer_dependencies
+               for transformer in self.transformers):
+            self._transformer_inputs = None
+            return
+        depends = set()
+        versions = []
+        for transformer in self.transformers:
+            transformer_depends, version = \
+                self._transformer_dependencies[transformer]
+            depends |= transformer_depends
+            if version is not None:
+                versions.append(version)
+        self._transformer_inputs = tuple(sorted(depends)), tuple(versions)
+
+    def _transformer_input(self, element, dependency):
+        """
+        Return the value of the given transformer input for element.
+
+        :param element: the element;
+        :param dependency: the name of the input.
+        :return: the value of the input for element.
+        """
+        if dependency == "selection":
+            return element in getattr(self, "selected", ())
+        elif dependency == "position":
+            return element.center
+        elif dependency == "bounds":
+            return self.graph_bbox()
+        else:
+            return element.label
+
+    def _transformers_outdated(self, element):
+        """
+        Return whether the transformers must be applied on element, that is,
+        whether some of their inputs changed since their last application on
+        element. The new inputs are remembered.
+
+        :param element: the element to check.
+        :return: True if the transformers must be applied on element.
+        """
+        if self._transformer_inputs is None:
+            return True
+        depends, versions = self._transformer_inputs
+        key = (tuple(self._transformer_input(element, dependency)
+                     for dependency in depends) +
+               tuple(version(element) for version in versions))
+        if self._transformer_keys.get(element) == key:
+            return False
+        self._transformer_keys[element] = key
+        return True
+
+
+CanvasGraph._flush_before(["addtag", "addtag_above", "addtag_all",
+                           "addtag_below", "addtag_closest",
+                           "addtag_enclosed", "addtag_overlapping",
+                           "addtag_withtag", "dchars", "dtag", "find",
+                           "find_above", "find_all", "find_below",
+                           "find_closest", "find_enclosed",
+                           "find_overlapping", "find_withtag", "gettags",
+                           "icursor", "index", "insert", "itemcget",
+                           "postscript", "type"])
 
 
 class InteractiveCanvasGraph(CanvasGraph):
@@ -463,20 +1993,28 @@ class InteractiveCanvasGraph(CanvasGraph):
         # Selected vertices
         self.selected = ObservableSet()
 
-        # Selected vertices transformer and observer
-        def selected(element, style):
-            if element in self.selected:
-                style["shape_style"]["fill"] = "yellow"
-            if element not in self.selected:
-                style["shape_style"]["fill"] = "white"
-        self.register_transformer(selected)
+        # Selected elements are highlighted through a style class
+        self.configure_style_class("selected", shape_style={"fill": "yellow"})
 
         class SelectionObserver:
             def __init__(self, canvas):
                 self.canvas = canvas
-
-            def update(self, _):
-                self.canvas.refresh()
+                self.previous = set()
+
+            def update(self, selection):
+                # Only elements whose selection state changed are restyled,
+                # and redrawn if transformers depend on the selection
+                current = set(selection)
+                changed = current ^ self.previous
+                self.canvas.remove_from_style_class("selected",
+                                                    self.previous - current)
+                self.canvas.add_to_style_class("selected",
+                                               current - self.previous)
+                self.previous = current
+                inputs = self.canvas._transformer_inputs
+                if inputs is None or "selection" in inputs[0]:
+                    self.canvas.invalidate(changed)
+                    self.canvas.request_refresh()
 
         observer = SelectionObserver(self)
         self.selected.register(observer)
@@ -493,8 +2031,7 @@ class InteractiveCanvasGraph(CanvasGraph):
 
     def apply_layout(self, layout):
         self.layouting.set(False)
-        layout.apply(self, self.vertices, self.edges, fixed=self.selected)
-        self.refresh()
+        self._commit_layout(layout, fixed=self.selected)
 
     def apply_interactive_layout(self, layout):
         def iter_layout():
@@ -502,18 +2039,25 @@ class InteractiveCanvasGraph(CanvasGraph):
                 return
 
             layout.apply(self, self.vertices, self.edges, fixed=self.selected)
-            self.refresh()
+            self.request_refresh()
 
             if self.layouting.get():
-                self.after(self.layout_interval, iter_layout)
+                self._schedule_layout_step(iter_layout)
 
+        self.stop_transition()
         if not self.layouting.get():
             self.layouting.set(True)
-        self.after(self.layout_interval, iter_layout)
+        self._schedule_layout_step(iter_layout)
 
-    def delete_element(self, element):
-        super(InteractiveCanvasGraph, self).delete_element(element)
-        self.selected.discard(element)
+    def delete_elements(self, elements):
+        deleted = super(InteractiveCanvasGraph, self).delete_elements(elements)
+        self.selected.difference_update(deleted)
+        return deleted
+
+    def clear(self):
+        deleted = super(InteractiveCanvasGraph, self).clear()
+        self.selected.clear()
+        return deleted
 
 
 class CanvasFrame(tk.Frame):
@@ -549,6 +2093,9 @@ class CanvasFrame(tk.Frame):
 
         self.canvas.grid(row=1, column=0, sticky=tk.N + tk.S + tk.E + tk.W)
 
+        # Animate layout transitions to preserve the mental map
+        self.canvas.transition_duration = 300
+
         xscrollbar.config(command=self.canvas.xview)
         yscrollbar.config(command=self.canvas.yview)
 
@@ -606,3 +2153,26 @@ class CanvasFrame(tk.Frame):
             self.canvas.yview_scroll(-1 * event.delta, "units")
 
         self.canvas.bind("<MouseWheel>", on_mousewheel)
+
+        # Zoom
+        zibutton = tk.Button(self.toolbar, text="Zoom in",
+                             command=lambda: self.canvas.zoom_in())
+        zibutton.grid(row=0, column=3, sticky=tk.W)
+        zobutton = tk.Button(self.toolbar, text="Zoom out",
+                             command=lambda: self.canvas.zoom_out())
+        zobutton.grid(row=0, column=4, sticky=tk.W)
+        fvbutton = tk.Button(self.toolbar, text="Fit to view",
+                             command=lambda: self.canvas.fit_to_view())
+        fvbutton.grid(row=0, column=5, sticky=tk.W)
+
+        self.canvas.bind("<Control-plus>", lambda e: self.canvas.zoom_in())
+        self.canvas.bind("<Control-minus>", lambda e: self.canvas.zoom_out())
+        self.canvas.bind("<Control-0>", lambda e: self.canvas.fit_to_view())
+
+        # Zoom around the mouse
+        def on_control_mousewheel(event):
+            self.canvas.zoom(1.25 if event.delta > 0 else 0.8,
+                             self.canvas.canvasx(event.x),
+                             self.canvas.canvasy(event.y))
+
+        self.canvas.bind("<Control-MouseWheel>", on_control_mousewheel)
@@ -5,17 +5,25 @@ This module defines the elements drawn on canvas graph: vertices and edges.
 """
 
 from copy import deepcopy
+from itertools import count
 import tkinter as tk
 from .shape import Rectangle, Oval
-from .util import ObservableSet, AttrDict, CanvasToolTip
+from .util import ObservableSet, AttrDict
 
 __all__ = ["Vertex", "Edge"]
 
+
+# Unique numbers of elements, giving their tags
+_element_numbers = count()
+
 class GraphElement:
     """
     An element of a graph, composed of a shape and text in it.
     """
 
+    # The kind of element, tagging its items on canvas
+    _kind = "element"
+
     def __init__(self, canvas, shape, label="", tooltip=None):
         """
         Create a graph element with shape, label and tooltip on canvas.
@@ -30,10 +38,22 @@ class GraphElement:
         self._canvas = canvas
         self.tooltip = tooltip
 
+        # The tag of all items of this element, and the events bound on it
+        self.tag = "element{}".format(next(_element_numbers))
+        self._bound_events = set()
+
         # Keep track of handle and handle of labels in canvas
         self._handle = None
         self._labelhandle = None
 
+        # The type of the shape drawn for the handle
+        self._shape_type = None
+
+        # The (x0, y0, x1, y1) bounding box of the shape of the element,
+        # authoritative whether the element is drawn or only placed on a
+        # virtualized canvas; the canvas is never queried for it
+        self._geometry = None
+
         # Common style
         self.style = AttrDict()
         self.style.shape = shape
@@ -64,20 +84,21 @@ class GraphElement:
 
         This element must be already drawn on its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
-        x0, y0, x1, y1 = self._canvas.coords(self._handle)
+        assert self._geometry is not None, "The element is not drawn yet"
+        x0, y0, x1, y1 = self._geometry
         return (x0 + x1) / 2, (y0 + y1) / 2
 
     @property
     def bbox(self):
         """
         Return the bounding box of this element.
-        :return: the (x0, y0, x1, y1) coordinates of the bounding box.
+        :return: the (x0, y0, x1, y1) coordinates of the bounding box of the
+                 shape of this element, outline excluded.
 
         This element must be already drawn on its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
-        return self._canvas.bbox(self._handle)
+        assert self._geometry is not None, "The element is not drawn yet"
+        return self._geometry
 
     @property
     def dimensions(self):
@@ -88,7 +109,6 @@ class GraphElement:
 
         This element must be already drawn on its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
         x0, y0, x1, y1 = self.bbox
         return x1 - x0, y1 - y0
 
@@ -102,7 +122,8 @@ class GraphElement:
     @label.setter
     def label(self, value):
         self.style["label"] = value
-        self.refresh()
+        self.invalidate()
+        self._canvas.request_refresh()
 
     @property
     def shape(self):
@@ -130,6 +151,13 @@ class GraphElement:
             bbox = self.bbox
         return self.shape.intersection(bbox, end)
 
+    def invalidate(self):
+        """
+        Mark this element as needing to be redrawn at next refresh of its
+        canvas.
+        """
+        self._canvas.invalidate((self,))
+
     def draw(self, x, y):
         """
         Draw this element on its canvas, centered at position x, y.
@@ -140,28 +168,48 @@ class GraphElement:
         canvas = self._canvas
 
         # Add label on canvas and store handle
+        bbox = self._label_bbox(self.style, x, y)
         if self.style["label"] != "":
-            self._labelhandle = canvas.create_text(x, y,
-                                                   text=self.style["label"])
-            bbox = canvas.bbox(self._labelhandle)
+            self._labelhandle = canvas.create_text(
+                x, y, text=self.style["label"],
+                **canvas._item_options(self, "label"))
+            canvas._insert_in_layer(self._labelhandle, self, "label")
+            canvas._applied_styles[self._labelhandle] = {
+                "text": self.style["label"]}
         else:
             self._labelhandle = None
-            bbox = (x, y, x, y)
 
         # Draw on canvas and store handle
-        self._handle = self.style["shape"].draw(canvas,
-                                                bbox,
-                                                self.style.shape_style)
+        self._handle = self.style["shape"].draw(
+            canvas, bbox, dict(self.style.shape_style,
+                               **canvas._item_options(self, "shape")))
+        canvas._applied_styles[self._handle] = dict(self.style.shape_style)
+        canvas._insert_in_layer(self._handle, self, "shape")
+        self._shape_type = type(self.style["shape"])
+        self._geometry = tuple(canvas._shape_dimension(self.style["shape"],
+                                                       bbox))
+        canvas._geometry_changed(self)
 
-        if self._labelhandle is not None:
-            canvas.tag_raise(self._labelhandle)
+        self.refresh()
 
-        if self.tooltip is not None:
-            for handle in self.handles:
-                CanvasToolTip(canvas, handle, follow_mouse=1,
-                              text=self.tooltip)
+    def _label_bbox(self, style, x, y):
+        """
+        Return the bounding box of the label of style centered at x, y,
+        measured without querying the canvas.
 
-        self.refresh()
+        :param style: the style of this element;
+        :param x: the horizontal position of the center of the label;
+        :param y: the vertical position of the center of the label.
+        :return: the (x0, y0, x1, y1) bounding box of the label; empty if
+                 the label is empty.
+        """
+        if style["label"] == "":
+            return x, y, x, y
+        label_style = style["label_style"]
+        width, height = self._canvas.measure_label(
+            style["label"], label_style.get("font"),
+            label_style.get("justify", tk.CENTER))
+        return x - width / 2, y - height / 2, x + width / 2, y + height / 2
 
     def refresh(self):
         """
@@ -171,20 +219,16 @@ class GraphElement:
         """
         assert self._handle is not None, "The element is not drawn yet"
         canvas = self._canvas
+        canvas._dirty.discard(self)
 
-        # Pass the style through the transformers
+        # Pass the style through the transformers, if their inputs changed
         style = self.style
-        for transformer in canvas.transformers:
-            transformer(self, style)
+        if canvas._transformers_outdated(self):
+            for transformer in canvas.transformers:
+                transformer(self, style)
 
         xc, yc = self.center
 
-        # Get the label bounding box
-        if self._labelhandle:
-            label_bbox = canvas.bbox(self._labelhandle)
-        else:
-            label_bbox = (xc, yc, xc, yc)
-
         # Update label
         new_label = style["label"]
         if new_label == "":
@@ -192,43 +236,47 @@ class GraphElement:
             if self._labelhandle is not None:
                 canvas._delete_handle(self._labelhandle)
                 self._labelhandle = None
-            # Set bbox as xc, yc, xc, yc
-            label_bbox = (xc, yc, xc, yc)
         else:
             # draw labelhandle if needed
             if self._labelhandle is None:
-                self._labelhandle = canvas.create_text(xc,
-                                                       yc,
-                                                       text=new_label)
+                self._labelhandle = canvas.create_text(
+                    xc, yc, text=new_label,
+                    **canvas._item_options(self, "label"))
+                canvas._insert_in_layer(self._labelhandle, self, "label")
+                canvas._applied_styles[self._labelhandle] = {
+                    "text": new_label}
                 canvas.handles[self._labelhandle] = self
             # or change text
             else:
-                canvas.itemconfig(self._labelhandle, text=new_label)
-            # Set bbox as text bbox
-            label_bbox = canvas.bbox(self._labelhandle)
-        # Update shape for new bbox
-        canvas.coords(self._handle,
-                      self.style["shape"].dimension(label_bbox))
-
-        # Update shape
+                canvas._configure_item(self._labelhandle, {"text": new_label})
+        label_bbox = self._label_bbox(style, xc, yc)
+        # Update shape: resize the existing item for the new bbox, or
+        # replace it if the shape changed type
         new_shape = style["shape"]
-        canvas._delete_handle(self._handle)
-        self._handle = self.style["shape"].draw(canvas,
-                                                label_bbox,
-                                                style["shape_style"])
-        canvas.handles[self._handle] = self
-        if style["label"]:
-            canvas.tag_raise(self._labelhandle)
-
-        # Update styles
-        canvas.itemconfig(self._handle, **style["shape_style"])
+        dimension = canvas._shape_dimension(new_shape, label_bbox)
+        self._geometry = tuple(dimension)
+        canvas._geometry_changed(self)
+        if type(new_shape) is self._shape_type:
+            canvas.coords(self._handle, *dimension)
+        else:
+            canvas._delete_handle(self._handle)
+            self._handle = new_shape.draw(
+                canvas, label_bbox,
+                dict(style["shape_style"],
+                     **canvas._item_options(self, "shape")))
+            canvas._applied_styles[self._handle] = dict(style["shape_style"])
+            canvas._insert_in_layer(self._handle, self, "shape")
+            self._shape_type = type(new_shape)
+            canvas.handles[self._handle] = self
+            if canvas.zoom_scale != 1:
+                canvas.coords(self._handle, *dimension)
+
+        # Update styles, sending only the options that changed
+        canvas._configure_item(self._handle, canvas._part_style(
+            self, "shape", style["shape_style"]))
         if self._labelhandle is not None:
-            canvas.itemconfig(self._labelhandle, **style["label_style"])
-        
-        # Raise
-        canvas.tag_raise(self._handle)
-        if style["label"]:
-            canvas.tag_raise(self._labelhandle)
+            canvas._configure_item(self._labelhandle, canvas._part_style(
+                self, "label", style["label_style"]))
 
     def move(self, dx, dy):
         """
@@ -237,14 +285,33 @@ class GraphElement:
         :param dx: the difference to move on x axis;
         :param dy: the difference to move on y axis.
 
+        This element must be already drawn on its canvas. The element is
+        marked to be redrawn at next refresh of its canvas.
+        """
+        self._move_handles(dx, dy)
+        self.invalidate()
+
+    def _move_handles(self, dx, dy):
+        """
+        Move the geometry and handles of this element, without refreshing it.
+        If the element is placed without being drawn, only its geometry
+        moves.
+
+        :param dx: the difference to move on x axis;
+        :param dy: the difference to move on y axis.
+
         This element must be already drawn on its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
+        assert self._geometry is not None, "The element is not drawn yet"
+        x0, y0, x1, y1 = self._geometry
+        self._geometry = (x0 + dx, y0 + dy, x1 + dx, y1 + dy)
         canvas = self._canvas
+        canvas._geometry_changed(self)
+        if self._handle is None:
+            return
         canvas.move(self._handle, dx, dy)
         if self._labelhandle is not None:
             canvas.move(self._labelhandle, dx, dy)
-        self.refresh()
 
     def move_to(self, x, y):
         """
@@ -257,7 +324,6 @@ class GraphElement:
 
         This element must be already drawn on its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
         curx, cury = self.center
         dx = x - curx
         dy = y - cury
@@ -270,6 +336,7 @@ class GraphElement:
         """
         self._handle = None
         self._labelhandle = None
+        self._shape_type = None
 
     def bind(self, event, callback, add=None):
         """
@@ -280,24 +347,23 @@ class GraphElement:
                          a function taking one argument: the event;
         :param add: if not None and set to "+", the new binding is added to any
                     existing binding.
+        :return: the identifier of the binding.
 
-        This element must be already drawn on its canvas.
+        The binding is attached to the tag of this element: it holds for all
+        its items, including the ones created after the binding, until this
+        element is deleted from its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
-        for handle in self.handles:
-            self._canvas.tag_bind(handle, event, callback, add)
+        self._bound_events.add(event)
+        return self._canvas.tag_bind(self.tag, event, callback, add)
 
     def unbind(self, event):
         """
         Remove all the bindings for event of the element on canvas.
 
         :param event: the event specifier to remove the binding on.
-
-        This element must be already drawn on its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
-        for handle in self.handles:
-            self._canvas.tag_unbind(handle, event)
+        self._bound_events.discard(event)
+        self._canvas.tag_unbind(self.tag, event)
 
 
 class Vertex(GraphElement):
@@ -318,6 +384,8 @@ class Vertex(GraphElement):
     selecting the vertex, but will not change back when deselecting it.
     """
 
+    _kind = "vertex"
+
     def __init__(self, canvas, label="", tooltip=None):
         """
         Create a vertex with label on canvas with tooltip.
@@ -338,6 +406,8 @@ class Edge(GraphElement):
     style.common.arrow dictionary for the arrow of the edge.
     """
 
+    _kind = "edge"
+
     def __init__(self, canvas, origin, end, label="", tooltip=None):
         """
         Create an edge between origin and end.
@@ -354,6 +424,9 @@ class Edge(GraphElement):
         self.end = end
         self._arrowhandle = None
 
+        # The inputs of the last routing of the arrow line
+        self._route_key = None
+
         # Common style
         self.style.arrow_style = AttrDict()
         self.style.arrow_style.arrow = "last"
@@ -376,6 +449,7 @@ class Edge(GraphElement):
         """
         super(Edge, self).delete_handles()
         self._arrowhandle = None
+        self._route_key = None
 
     def _refresh_arrows(self):
         """
@@ -383,35 +457,87 @@ class Edge(GraphElement):
 
         This element must be already drawn on its canvas.
         """
-        assert self._handle is not None, "The element is not drawn yet"
-        canvas = self._canvas
+        Edge._refresh_all_arrows((self,))
 
-        # Draw line: from origin to label and from label to end
-        xo, yo = self.origin.style["shape"].intersection(self.origin.bbox,
-                                                         self.center)
-        xol, yol = self.style["shape"].intersection(self.bbox,
-                                                    self.origin.center)
-        xel, yel = self.style["shape"].intersection(self.bbox,
-                                                    self.end.center)
-        xe, ye = self.end.style["shape"].intersection(self.end.bbox,
-                                                      self.center)
+    @staticmethod
+    def _refresh_all_arrows(edges):
+        """
+        Redraw the arrows of the given edges, computing the intersections
+        of their lines with the shapes of all edges at once.
 
+        :param edges: the edges, already drawn on their canvas.
+        """
+        # A line only depends on the geometry and shapes of the edge and its
+        # ends; skip routing if none changed
+        routed = []
+        for edge in edges:
+            assert edge._handle is not None, "The element is not drawn yet"
+            key = (edge.origin._geometry, edge.origin.style["shape"],
+                   edge._geometry, edge.style["shape"],
+                   edge.end._geometry, edge.end.style["shape"])
+            if edge._arrowhandle is not None and key == edge._route_key:
+                edge._canvas._configure_item(
+                    edge._arrowhandle, edge._canvas._part_style(
+                        edge, "arrow", edge.style.arrow_style))
+            else:
+                edge._route_key = key
+                routed.append(edge)
+
+        # Lines go from origin to label and from label to end; their points
+        # are grouped by shape to be computed together
+        requests = {}
+        for index, edge in enumerate(routed):
+            _, origin_shape, _, shape, _, end_shape = edge._route_key
+            for slot, (point_shape, bbox, end) in enumerate((
+                    (origin_shape, edge.origin.bbox, edge.center),
+                    (shape, edge.bbox, edge.origin.center),
+                    (shape, edge.bbox, edge.end.center),
+                    (end_shape, edge.end.bbox, edge.center))):
+                bboxes, ends, slots = requests.setdefault(point_shape,
+                                                          ([], [], []))
+                bboxes.append(bbox)
+                ends.append(end)
+                slots.append((index, slot))
+        points = [[None] * 4 for _ in routed]
+        for point_shape, (bboxes, ends, slots) in requests.items():
+            for (index, slot), point in zip(
+                    slots, point_shape.intersections(bboxes, ends)):
+                points[index][slot] = point
+
+        for edge, route in zip(routed, points):
+            edge._draw_arrow([value for point in route for value in point])
+
+    def _draw_arrow(self, coords):
+        """
+        Draw the arrow line of this edge with the given coordinates.
+
+        :param coords: the coordinates of the points of the line.
+        """
+        canvas = self._canvas
         if self._arrowhandle is not None:
-            canvas.coords(self._arrowhandle, *(xo, yo, xol, yol,
-                                               xel, yel, xe, ye))
-            canvas.itemconfig(self._arrowhandle, **self.style.arrow_style)
+            canvas.coords(self._arrowhandle, *coords)
+            canvas._configure_item(self._arrowhandle, canvas._part_style(
+                self, "arrow", self.style.arrow_style))
         else:
-            self._arrowhandle = canvas.create_line((xo, yo, xol, yol,
-                                                    xel, yel, xe, ye),
-                                                   **self.style.arrow_style)
-        canvas.tag_raise(self._handle)
-        if self._labelhandle is not None:
-            canvas.tag_raise(self._labelhandle)
+            self._arrowhandle = canvas.create_line(
+                coords, **dict(self.style.arrow_style,
+                               **canvas._item_options(self, "arrow")))
+            canvas._applied_styles[self._arrowhandle] = dict(
+                self.style.arrow_style)
+            canvas._insert_in_layer(self._arrowhandle, self, "arrow")
 
     def draw(self, x, y):
         super(Edge, self).draw(x, y)
         self._refresh_arrows()
 
-    def refresh(self):
+    def refresh(self, arrows=True):
+        """
+        Refresh the appearance of this edge on canvas.
+
+        :param arrows: whether to redraw the arrows of this edge too.
+
+        This element must be already drawn on its canvas.
+        """
         super(Edge, self).refresh()
-        self._refresh_arrows()
+        if arrows:
+            self._refresh_arrows()
@@ -25,6 +25,23 @@ class Layout:
         :param vertices: the set of vertices to move;
         :param edges: the set of edges to move;
         :param fixed: a set of elements that must remain at given position.
+
+        By default, move the elements to the positions given by
+        self.positions, at once.
+        """
+        canvas.set_positions(self.positions(canvas, vertices, edges,
+                                            fixed=fixed))
+
+    def positions(self, canvas, vertices, edges, fixed=None):
+        """
+        Return the new positions of the given vertices and edges, without
+        moving them.
+
+        :param canvas: the canvas on which operate;
+        :param vertices: the set of vertices to place;
+        :param edges: the set of edges to place;
+        :param fixed: a set of elements that must remain at given position.
+        :return: a dictionary of elements -> new (x, y) positions.
         """
         raise NotImplementedError("Should be implemented by subclasses.")
 
@@ -78,6 +95,44 @@ class OneStepForceBasedLayout(Layout):
 
         return xvi, yvi, xoi, yoi
 
+    def _distance_vectors_from(self, positions, vertex, others):
+        """
+        Return the distance vectors from vertex to each of the others, as
+        given by _distance_vector_from, computing the shape intersections
+        of all couples at once.
+
+        :param positions: the positions of all vertices;
+        :param vertex: a vertex of positions;
+        :param others: a list of other vertices of positions.
+        :return: the list of distance vectors between vertex and others.
+        """
+        xvc, yvc = positions[vertex]
+        vw, vh = vertex.dimensions
+        vbbox = (xvc - vw / 2, yvc - vh / 2, xvc + vw / 2, yvc + vh / 2)
+
+        # Intersections with the shape of vertex
+        vpoints = vertex.shape.intersections([vbbox] * len(others),
+                                             [positions[other]
+                                              for other in others])
+
+        # Intersections with the shapes of others, grouped by shape
+        groups = {}
+        for index, other in enumerate(others):
+            xoc, yoc = positions[other]
+            ow, oh = other.dimensions
+            indices, bboxes = groups.setdefault(other.shape, ([], []))
+            indices.append(index)
+            bboxes.append((xoc - ow / 2, yoc - oh / 2,
+                           xoc + ow / 2, yoc + oh / 2))
+        opoints = [None] * len(others)
+        for shape, (indices, bboxes) in groups.items():
+            points = shape.intersections(bboxes, [(xvc, yvc)] * len(bboxes))
+            for index, point in zip(indices, points):
+                opoints[index] = point
+
+        return [(xvi, yvi, xoi, yoi)
+                for (xvi, yvi), (xoi, yoi) in zip(vpoints, opoints)]
+
     def _hooke_attraction(self, positions, vertex, other):
         """
         Return the force produced by the spring between vertex and other,
@@ -120,18 +175,21 @@ class OneStepForceBasedLayout(Layout):
 
         return fx, fy
 
-    def _coulomb_repulsion(self, positions, vertex, other):
+    def _coulomb_repulsion(self, positions, vertex, other, vector=None):
         """
         Return the electrical force produced by the other vertex on vertex.
         
         :param positions: the positions of the vertices
                           (a vertex -> x,y position dictionary);
         :param vertex: a vertex of positions;
-        :param other: another vertex of positions.
+        :param other: another vertex of positions;
+        :param vector: if not None, the distance vector from vertex to
+                       other, as given by _distance_vector_from.
         :return: the electrical force vector produced by other on vertex.
         """
-        dx0, dy0, dx1, dy1 = self._distance_vector_from(positions,
-                                                        vertex, other)
+        if vector is None:
+            vector = self._distance_vector_from(positions, vertex, other)
+        dx0, dy0, dx1, dy1 = vector
 
         # Use center to check when vertices overlap
         vcx, vcy = positions[vertex]
@@ -179,12 +237,13 @@ class OneStepForceBasedLayout(Layout):
             fx, fy = 0, 0
 
             # Repulsion forces
-            for v in positions:
-                if vertex != v:
-                    cfx, cfy = self._coulomb_repulsion(positions,
-                                                       vertex, v)
-                    fx += cfx
-                    fy += cfy
+            others = [v for v in positions if v != vertex]
+            vectors = self._distance_vectors_from(positions, vertex, others)
+            for v, vector in zip(others, vectors):
+                cfx, cfy = self._coulomb_repulsion(positions, vertex, v,
+                                                   vector)
+                fx += cfx
+                fy += cfy
 
             # Spring forces
             for origin, end in links:
@@ -222,7 +281,7 @@ class OneStepForceBasedLayout(Layout):
                 sum_forces / len(new_positions)
                 if len(new_positions) > 0 else 0)
 
-    def apply(self, canvas, vertices, edges, fixed=None):
+    def positions(self, canvas, vertices, edges, fixed=None):
         positions = {element: element.center
                      for element in vertices | edges}
         links = set()
@@ -234,9 +293,7 @@ class OneStepForceBasedLayout(Layout):
                                           positions,
                                           links,
                                           fixed=fixed)
-
-        for element, position in np.items():
-            element.move_to(*position)
+        return np
 
 
 class ForceBasedLayout(OneStepForceBasedLayout):
@@ -249,7 +306,7 @@ class ForceBasedLayout(OneStepForceBasedLayout):
         self.iterationNumber = 100
         self.forceThreshold = 0.001
 
-    def apply(self, canvas, vertices, edges, fixed=None):
+    def positions(self, canvas, vertices, edges, fixed=None):
         positions = {element: element.center
                      for element in vertices | edges}
         links = set()
@@ -265,8 +322,7 @@ class ForceBasedLayout(OneStepForceBasedLayout):
             if sf < self.forceThreshold:
                 break
 
-        for element, position in positions.items():
-            element.move_to(*position)
+        return positions
 
 
 try:
@@ -275,14 +331,29 @@ except ImportError:
     pydot = None
 
 
-class DotLayout:
+def _dot_quote(text):
+    """
+    Return text as a quoted DOT string.
+
+    :param text: the text to quote.
+    :return: the DOT string, with its quotes.
+    """
+    return '"' + (text.replace("\\", "\\\\").replace('"', '\\"')
+                  .replace("\n", "\\n")) + '"'
+
+
+class DotLayout(Layout):
     """
     A layout using fdp (part of graphviz library) to layout the graph.
+
+    Both vertices and edges, through their label, are placed; fixed elements
+    are pinned at their current position.
     """
 
-    def apply(self, _, vertices, edges, fixed=None):
+    def positions(self, _, vertices, edges, fixed=None):
         if pydot is None:
             raise ImportError("Cannot use dot layout, pydot is not installed.")
+        fixed = set(fixed) if fixed is not None else set()
 
         positions = {element: element.center
                      for element in vertices | edges}
@@ -301,9 +372,13 @@ class DotLayout:
 
         dot = "digraph {"
 
-        # Add states to the dot representation
+        # Add states to the dot representation, pinning the fixed ones
         for v in ids:
-            dot += (ids[v] + " " + "[label=\"" + v.label + "\"]" + ";\n")
+            attributes = "label=" + _dot_quote(v.label)
+            if v in fixed:
+                x, y = positions[v]
+                attributes += ", pos=\"{},{}!\"".format(x, y)
+            dot += (ids[v] + " [" + attributes + "];\n")
 
         # For each state, add each transition to the representation
         for origin, end in links:
@@ -318,11 +393,13 @@ class DotLayout:
         graph = pydot.graph_from_dot_data(graph.create_dot(prog="fdp"))
 
         new_positions = {}
-        for vertex in vertices:
-            pos = graph.get_node(ids[vertex])[0].get("pos")
+        for element in positions:
+            if element in fixed:
+                new_positions[element] = positions[element]
+                continue
+            pos = graph.get_node(ids[element])[0].get("pos")
             pos = pos[1:-1]
             pos = pos.split(',')
-            new_positions[vertex] = int(float(pos[0])), int(float(pos[1]))
+            new_positions[element] = int(float(pos[0])), int(float(pos[1]))
 
-        for element, position in positions.items():
-            element.move_to(*position)
+        return new_positions
@@ -0,0 +1,135 @@
+"""
+Levels of detail.
+
+This module defines the levels of detail of canvas graphs: which parts of the
+elements are drawn, depending on the zoom scale of the canvas and the
+on-screen size of its elements.
+
+Items of canvas graphs are tagged with the kind of their element ("vertex" or
+"edge") and their part ("shape", "label" or "arrow"). Switching between
+levels never recreates items: parts that are not drawn are hidden through
+these tags, and vertices drawn as dots are restyled at the next refresh.
+Vertices drawn as dots keep their shape, filled, and still respond to events.
+"""
+
+__all__ = ["LevelOfDetail", "LevelOfDetailPolicy"]
+
+
+# The default arrow shape of Tk lines
+_DEFAULT_ARROWSHAPE = (8, 10, 3)
+
+
+class LevelOfDetail:
+    """
+    A level of detail, telling which parts of the elements are drawn.
+    """
+
+    def __init__(self, labels=True, arrows=True, edge_shapes=True,
+                 vertex_dots=False, dot_color="black"):
+        """
+        Create a new level of detail.
+
+        :param labels: whether labels are drawn;
+        :param arrows: whether edges are drawn with arrowheads;
+        :param edge_shapes: whether the shapes around edge labels are drawn;
+        :param vertex_dots: whether vertices are drawn as plain dots, that
+                            is, filled with dot_color;
+        :param dot_color: the color of vertices drawn as dots.
+        """
+        self.labels = labels
+        self.arrows = arrows
+        self.edge_shapes = edge_shapes
+        self.vertex_dots = vertex_dots
+        self.dot_color = dot_color
+
+    def _key(self):
+        return (self.labels, self.arrows, self.edge_shapes, self.vertex_dots,
+                self.dot_color)
+
+    def __eq__(self, other):
+        return (isinstance(other, LevelOfDetail) and
+                self._key() == other._key())
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def options(self, kind, part):
+        """
+        Return the options items of the given kind and part must have at this
+        level, on top of their style.
+
+        :param kind: the kind of element, "vertex" or "edge";
+        :param part: the part of the element, "shape", "label" or "arrow".
+        :return: a dictionary of tkinter canvas item options.
+        """
+        if part == "label" and not self.labels:
+            return {"state": "hidden"}
+        if part == "arrow" and not self.arrows:
+            return {"arrowshape": (0, 0, 0)}
+        if part == "shape":
+            if kind == "edge" and not self.edge_shapes:
+                return {"state": "hidden"}
+            if kind == "vertex" and self.vertex_dots:
+                return {"fill": self.dot_color, "outline": self.dot_color}
+        return {}
+
+    def apply(self, canvas):
+        """
+        Apply this level of detail to the labels, edge shapes and arrows of
+        canvas, with one item configuration per part.
+
+        :param canvas: the canvas graph.
+
+        Vertex shapes depend on the style of each vertex; they are not
+        changed here but when the vertices are refreshed.
+        """
+        parts = [("label", self.labels), ("edge&&shape", self.edge_shapes)]
+        for tag, drawn in parts:
+            canvas.itemconfigure(tag, state="normal" if drawn else "hidden")
+        canvas.itemconfigure("arrow",
+                             arrowshape=(_DEFAULT_ARROWSHAPE if self.arrows
+                                         else (0, 0, 0)))
+
+
+class LevelOfDetailPolicy:
+    """
+    A policy choosing the level of detail of a canvas from its zoom scale and
+    the on-screen size of its elements.
+    """
+
+    def __init__(self, min_label_size=6, min_vertex_size=5,
+                 min_edge_scale=0.5):
+        """
+        Create a new level of detail policy.
+
+        :param min_label_size: the minimal on-screen height of drawn labels;
+        :param min_vertex_size: the on-screen size under which vertices are
+                                drawn as dots;
+        :param min_edge_scale: the minimal scale at which edges are drawn
+                               with arrowheads and label shapes.
+        """
+        self.min_label_size = min_label_size
+        self.min_vertex_size = min_vertex_size
+        self.min_edge_scale = min_edge_scale
+
+    def level(self, scale, label_size, vertex_size=None):
+        """
+        Return the level of detail at the given zoom scale and on-screen
+        sizes.
+
+        :param scale: the zoom scale of the canvas, 1 meaning no zoom;
+        :param label_size: the on-screen height of a line of label, in
+                           pixels;
+        :param vertex_size: the on-screen size of the largest vertex, in
+                            pixels, or None if there are no vertices.
+        :return: the level of detail to apply.
+
+        Vertices are drawn as dots only if they are all smaller than
+        min_vertex_size, such that large vertices are never reduced to dots.
+        """
+        return LevelOfDetail(
+            labels=label_size >= self.min_label_size,
+            arrows=scale >= self.min_edge_scale,
+            edge_shapes=scale >= self.min_edge_scale,
+            vertex_dots=(vertex_size is not None and
+                         vertex_size < self.min_vertex_size))
@@ -0,0 +1,371 @@
+"""
+Layout metrics.
+
+This module provides measures of the quality of a graph layout: edge
+crossings, overlapping elements, stress, edge length variance and angular
+resolution. They can be computed from a canvas, or from a snapshot of the
+positions of the elements, with the same representation as layouts use:
+
+* boxes: a dictionary of elements -> (x0, y0, x1, y1) bounding boxes;
+* positions: a dictionary of elements -> (x, y) positions;
+* links: a set of (origin, end) couples of elements; an edge of a canvas
+  graph gives two links, from its origin to itself and from itself to its
+  end.
+
+All measures are designed to be cheap enough to be computed live.
+"""
+
+import math
+from collections import defaultdict, deque
+
+
+__all__ = ["IntervalTree", "snapshot", "centers", "crossings", "overlaps",
+           "stress", "edge_length_variance", "angular_resolution",
+           "measure"]
+
+
+class IntervalTree:
+    """
+    A static centered interval tree.
+
+    The tree stores (low, high, value) intervals and returns the ones
+    overlapping a given interval.
+    """
+
+    def __init__(self, intervals):
+        """
+        Create a new interval tree containing the given intervals.
+
+        :param intervals: an iterable of (low, high, value) triples.
+        """
+        self._root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        """
+        Return the root node of the tree storing the given intervals.
+
+        :param intervals: a list of (low, high, value) triples.
+        :return: a (center, by_low, by_high, left, right) node, or None if
+                 there are no intervals.
+        """
+        if not intervals:
+            return None
+        bounds = sorted(bound for low, high, _ in intervals
+                        for bound in (low, high))
+        center = bounds[len(bounds) // 2]
+
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+
+        by_low = sorted(here, key=lambda interval: interval[0])
+        by_high = sorted(here, key=lambda interval: interval[1], reverse=True)
+        return (center, by_low, by_high,
+                self._build(left), self._build(right))
+
+    def overlapping(self, low, high):
+        """
+        Return the values of the intervals strictly overlapping [low, high].
+
+        :param low: the lower bound of the interval;
+        :param high: the upper bound of the interval.
+        :return: the list of values of the intervals overlapping the given
+                 one, excluding the ones only touching it.
+        """
+        result = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, by_low, by_high, left, right = node
+            if high <= center:
+                # Only intervals starting before high can overlap
+                for ilow, ihigh, value in by_low:
+                    if ilow >= high:
+                        break
+                    if ihigh > low:
+                        result.append(value)
+                if low < center:
+                    stack.append(left)
+            elif low >= center:
+                # Only intervals ending after low can overlap
+                for ilow, ihigh, value in by_high:
+                    if ihigh <= low:
+                        break
+                    if ilow < high:
+                        result.append(value)
+                stack.append(right)
+            else:
+                # The interval strictly contains the center: all intervals
+                # of the node overlap it
+                result.extend(value for _, _, value in by_low)
+                stack.append(left)
+                stack.append(right)
+        return result
+
+
+def snapshot(canvas):
+    """
+    Return the bounding boxes and links of the graph displayed on canvas.
+
+    :param canvas: the canvas graph to take the snapshot of.
+    :return: a (boxes, links) pair where boxes is a dictionary of
+             elements -> bounding boxes and links a set of couples of
+             elements.
+    """
+    boxes = {element: tuple(element.bbox)
+             for element in canvas.vertices | canvas.edges}
+    links = set()
+    for edge in canvas.edges:
+        links.add((edge.origin, edge))
+        links.add((edge, edge.end))
+    return boxes, links
+
+
+def centers(boxes):
+    """
+    Return the positions of the centers of the given bounding boxes.
+
+    :param boxes: a dictionary of elements -> bounding boxes.
+    :return: a dictionary of elements -> (x, y) positions.
+    """
+    return {element: ((x0 + x1) / 2, (y0 + y1) / 2)
+            for element, (x0, y0, x1, y1) in boxes.items()}
+
+
+def _segment_intersection(p1, p2, q1, q2):
+    """
+    Return the intersection point of segments p1p2 and q1q2 if they properly
+    cross, None otherwise.
+
+    Collinear segments are not considered as crossing.
+    """
+    rx, ry = p2[0] - p1[0], p2[1] - p1[1]
+    sx, sy = q2[0] - q1[0], q2[1] - q1[1]
+    denominator = rx * sy - ry * sx
+    if denominator == 0:
+        return None
+    qpx, qpy = q1[0] - p1[0], q1[1] - p1[1]
+    t = (qpx * sy - qpy * sx) / denominator
+    u = (qpx * ry - qpy * rx) / denominator
+    if 0 <= t <= 1 and 0 <= u <= 1:
+        return p1[0] + t * rx, p1[1] + t * ry
+    return None
+
+
+def crossings(positions, links):
+    """
+    Return the number of crossings between the given links.
+
+    :param positions: a dictionary of elements -> (x, y) positions;
+    :param links: an iterable of (origin, end) couples of elements of
+                  positions.
+    :return: the number of pairs of links crossing each other.
+
+    Links sharing an element never cross. The links are swept from left to
+    right: each link is only checked against the links whose horizontal
+    extent overlaps its own and which overlap it vertically, and each pair
+    of links is checked at most once.
+    """
+    segments = []
+    for origin, end in links:
+        if origin != end:
+            p, q = positions[origin], positions[end]
+            segments.append((min(p[0], q[0]), max(p[0], q[0]),
+                             min(p[1], q[1]), max(p[1], q[1]),
+                             origin, end, p, q))
+    segments.sort(key=lambda segment: segment[0])
+
+    count = 0
+    active = []
+    for segment in segments:
+        x0, _, y0, y1, o1, e1, p1, p2 = segment
+        # Drop the links ending before this one starts
+        active = [other for other in active if other[1] >= x0]
+        for _, _, oy0, oy1, o2, e2, q1, q2 in active:
+            if oy1 < y0 or y1 < oy0:
+                continue
+            if o1 in (o2, e2) or e1 in (o2, e2):
+                continue
+            if _segment_intersection(p1, p2, q1, q2) is not None:
+                count += 1
+        active.append(segment)
+    return count
+
+
+def overlaps(boxes):
+    """
+    Return the number of pairs of overlapping bounding boxes.
+
+    :param boxes: a dictionary of elements -> bounding boxes.
+    :return: the number of pairs of elements whose bounding boxes overlap;
+             touching boxes do not overlap.
+    """
+    items = list(boxes.values())
+    tree = IntervalTree((x0, x1, index)
+                        for index, (x0, _, x1, _) in enumerate(items))
+    count = 0
+    for index, (x0, y0, x1, y1) in enumerate(items):
+        for other in tree.overlapping(x0, x1):
+            if other > index:
+                _, oy0, _, oy1 = items[other]
+                if oy0 < y1 and y0 < oy1:
+                    count += 1
+    return count
+
+
+def _distances(links, sources):
+    """
+    Return the graph-theoretic distances from the given sources.
+
+    :param links: an iterable of (origin, end) couples, seen as undirected;
+    :param sources: the elements to compute the distances from.
+    :return: a dictionary of source -> (element -> distance) dictionaries.
+    """
+    neighbors = defaultdict(set)
+    for origin, end in links:
+        neighbors[origin].add(end)
+        neighbors[end].add(origin)
+
+    distances = {}
+    for source in sources:
+        reached = {source: 0}
+        queue = deque([source])
+        while queue:
+            element = queue.popleft()
+            for neighbor in neighbors[element]:
+                if neighbor not in reached:
+                    reached[neighbor] = reached[element] + 1
+                    queue.append(neighbor)
+        distances[source] = reached
+    return distances
+
+
+def stress(positions, links, sources=None):
+    """
+    Return the normalized stress of the given layout.
+
+    :param positions: a dictionary of elements -> (x, y) positions;
+    :param links: an iterable of (origin, end) couples of elements of
+                  positions;
+    :param sources: if not None, the elements from which distances are
+                    computed; use all elements otherwise. Giving a sample of
+                    elements makes the measure cheaper on large graphs.
+    :return: the stress of the layout, that is, the average squared relative
+             difference between the geometric distances and the
+             graph-theoretic distances of connected elements, the latter
+             being scaled to best fit the former. A perfect layout has a
+             stress of 0.
+
+    The stress does not depend on the scale of the layout.
+    """
+    if sources is None:
+        sources = positions
+    ratios = []
+    for source, reached in _distances(links, sources).items():
+        xs, ys = positions[source]
+        for element, distance in reached.items():
+            if distance > 0:
+                xe, ye = positions[element]
+                ratios.append(math.hypot(xe - xs, ye - ys) / distance)
+    if not ratios:
+        return 0
+    # The best scale of the graph-theoretic distances is the mean ratio
+    scale = sum(ratios) / len(ratios)
+    if scale == 0:
+        return 0
+    return sum((ratio / scale - 1) ** 2 for ratio in ratios) / len(ratios)
+
+
+def edge_length_variance(positions, links):
+    """
+    Return the normalized variance of the lengths of the given links.
+
+    :param positions: a dictionary of elements -> (x, y) positions;
+    :param links: an iterable of (origin, end) couples of elements of
+                  positions.
+    :return: the variance of the lengths divided by their squared mean, such
+             that the measure does not depend on the scale of the layout;
+             0 if all links have the same length.
+    """
+    lengths = [math.hypot(positions[end][0] - positions[origin][0],
+                          positions[end][1] - positions[origin][1])
+               for origin, end in links if origin != end]
+    if not lengths:
+        return 0
+    mean = sum(lengths) / len(lengths)
+    if mean == 0:
+        return 0
+    variance = sum((length - mean) ** 2 for length in lengths) / len(lengths)
+    return variance / (mean * mean)
+
+
+def angular_resolution(positions, links):
+    """
+    Return the angular resolution of the given layout.
+
+    :param positions: a dictionary of elements -> (x, y) positions;
+    :param links: an iterable of (origin, end) couples of elements of
+                  positions.
+    :return: the smallest angle, in radians, between two links incident to
+             the same element; 2 * pi if no element has two incident links.
+    """
+    angles = defaultdict(list)
+    for origin, end in links:
+        if origin == end:
+            continue
+        xo, yo = positions[origin]
+        xe, ye = positions[end]
+        if (xo, yo) == (xe, ye):
+            continue
+        angles[origin].append(math.atan2(ye - yo, xe - xo))
+        angles[end].append(math.atan2(yo - ye, xo - xe))
+
+    resolution = 2 * math.pi
+    for incident in angles.values():
+        if len(incident) < 2:
+            continue
+        incident.sort()
+        gaps = [second - first
+                for first, second in zip(incident, incident[1:])]
+        gaps.append(2 * math.pi - incident[-1] + incident[0])
+        resolution = min(resolution, min(gaps))
+    return resolution
+
+
+def measure(canvas=None, boxes=None, links=None, samples=50):
+    """
+    Return all metrics of the given layout.
+
+    :param canvas: if not None, the canvas graph to measure;
+    :param boxes: if canvas is None, a dictionary of elements -> bounding
+                  boxes;
+    :param links: if canvas is None, an iterable of (origin, end) couples of
+                  elements of boxes;
+    :param samples: the number of elements the stress is computed from,
+                    evenly picked among all elements; if None, the stress is
+                    computed from all elements.
+    :return: a dictionary of metric names -> values, with keys
+             "crossings", "overlaps", "stress", "edge_length_variance" and
+             "angular_resolution".
+    """
+    if canvas is not None:
+        boxes, links = snapshot(canvas)
+    links = set(links) if links is not None else set()
+    positions = centers(boxes)
+    sources = None
+    if samples is not None and len(positions) > samples:
+        elements = list(positions)
+        sources = [elements[index * len(elements) // samples]
+                   for index in range(samples)]
+    return {"crossings": crossings(positions, links),
+            "overlaps": overlaps(boxes),
+            "stress": stress(positions, links, sources),
+            "edge_length_variance": edge_length_variance(positions, links),
+            "angular_resolution": angular_resolution(positions, links)}
@@ -0,0 +1,101 @@
+"""
+Canvas item pooling.
+
+This module defines pools of hidden canvas items. Instead of deleting the
+items of elements and creating new ones, canvas graphs put them in a pool and
+reuse them by reconfiguring and showing them, which is cheaper for Tk and
+keeps the batch of canvas commands going.
+"""
+
+from collections import defaultdict
+
+
+__all__ = ["ItemPool"]
+
+
+class ItemPool:
+    """
+    A pool of hidden canvas items, by item type.
+
+    A pooled item is hidden and has no tags, such that no tag-wide command
+    reaches it. Each pooled item remembers the options set on it while in
+    use; these are reset to their default values when the item is reused.
+    The pool keeps at most max_size items of each type, the extra released
+    items being deleted.
+    """
+
+    def __init__(self, canvas, max_size=256):
+        """
+        Create a new item pool for canvas.
+
+        :param canvas: the canvas the items belong to;
+        :param max_size: the maximal number of pooled items of each type.
+        """
+        self.canvas = canvas
+        self.max_size = max_size
+
+        # Pooled (handle, option names) couples, indexed by item type
+        self._items = defaultdict(list)
+        # Default values of options, indexed by item type
+        self._defaults = {}
+
+    def __len__(self):
+        return sum(len(items) for items in self._items.values())
+
+    def acquire(self, item_type, coords, options):
+        """
+        Return a pooled item of the given type, reconfigured with coords and
+        options and shown, if any.
+
+        :param item_type: the type of item, such as "oval" or "line";
+        :param coords: the flat list of coordinates of the item;
+        :param options: a dictionary of item options.
+        :return: the handle of the reused item, or None if no item of this
+                 type is pooled.
+        """
+        items = self._items.get(item_type)
+        if not items:
+            return None
+        handle, names = items.pop()
+        defaults = self._defaults[item_type]
+        reset = {name: defaults[name] for name in names
+                 if name not in options and name in defaults}
+        reset.update(options)
+        self.canvas.coords(handle, *coords)
+        self.canvas.itemconfigure(handle, **reset)
+        return handle
+
+    def release(self, handle, item_type, names):
+        """
+        Hide the given item and put it in this pool, if not full.
+
+        :param handle: the handle of the item;
+        :param item_type: the type of the item;
+        :param names: the names of the options set on the item.
+        :return: True if the item has been pooled, False if the pool is full
+                 and the item must be deleted.
+        """
+        items = self._items[item_type]
+        if len(items) >= self.max_size:
+            return False
+        if item_type not in self._defaults:
+            self._defaults[item_type] = {
+                name: config[3]
+                for name, config in self.canvas.itemconfigure(handle).items()}
+        self.canvas.itemconfigure(handle, state="hidden", tags="")
+        items.append((handle, set(names) | {"state", "tags"}))
+        return True
+
+    def trim(self, size=0):
+        """
+        Delete pooled items such that at most size items of each type are
+        kept.
+
+        :param size: the number of items of each type to keep.
+        """
+        handles = []
+        for items in self._items.values():
+            while len(items) > size:
+                handles.append(items.pop()[0])
+        if handles:
+            self.canvas.delete(*handles)
@@ -6,10 +6,34 @@ This module defines shapes for graph elements.
 
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 __all__ = ["Shape", "Oval", "Rectangle"]
 
 
+# Below this number of intersections, the NumPy overhead is not worth it
+_NUMPY_THRESHOLD = 16
+
+
+def _arrays(bboxes, ends):
+    """
+    Return the given bounding boxes and points as NumPy arrays of
+    coordinates.
+
+    :param bboxes: a sequence of (x0, y0, x1, y1) bounding boxes;
+    :param ends: a sequence of (x, y) points.
+    :return: the x0, y0, x1, y1, x and y arrays.
+    """
+    bboxes = numpy.asarray(bboxes, dtype=float).reshape(-1, 4)
+    ends = numpy.asarray(ends, dtype=float).reshape(-1, 2)
+    return (bboxes[:, 0], bboxes[:, 1], bboxes[:, 2], bboxes[:, 3],
+            ends[:, 0], ends[:, 1])
+
+
 class Shape:
     """
     The shape of a graph element.
@@ -42,6 +66,24 @@ class Shape:
         """
         raise NotImplementedError("Should be implemented by subclasses.")
 
+    def intersections(self, bboxes, ends):
+        """
+        Return the points of intersection between this shape with each of the
+        given bounding boxes, and the line segments defined by the centers of
+        these bounding boxes and the corresponding ends.
+
+        :param bboxes: a sequence of n tkinter-style bounding boxes of this
+                       shape;
+        :param ends: a sequence of n (x, y) coordinates of ending points.
+        :return: the list of n intersection points, as given by
+                 self.intersection.
+
+        By default, intersections are computed one by one; subclasses can
+        compute them all at once.
+        """
+        return [self.intersection(bbox, end)
+                for bbox, end in zip(bboxes, ends)]
+
     def dimension(self, bbox):
         """
         Return the dimension of this shape around the given bounding box.
@@ -67,9 +109,34 @@ class Oval(Shape):
         """
         self._diameter = diameter
 
+    def __eq__(self, other):
+        return type(self) is type(other) and self._diameter == other._diameter
+
+    def __hash__(self):
+        return hash((type(self), self._diameter))
+
     def draw(self, canvas, bbox, style):
         return canvas.create_oval(self.dimension(bbox), **style)
 
+    def intersections(self, bboxes, ends):
+        if numpy is None or len(bboxes) < _NUMPY_THRESHOLD:
+            return super(Oval, self).intersections(bboxes, ends)
+        x0, y0, x1, y1, xe, ye = _arrays(bboxes, ends)
+        xc, yc = (x1 + x0) / 2, (y1 + y0) / 2
+        a, b = x1 - xc, y1 - yc
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            vertical = xe == xc
+            m = (ye - yc) / numpy.where(vertical, 1, xe - xc)
+            root = numpy.sqrt(a * a * m * m + b * b)
+            dx = numpy.where(vertical, 0, a * b / root)
+            dy = numpy.where(vertical, numpy.where(ye > yc, -b, b),
+                             a * b * m / root)
+
+        return numpy.column_stack(
+            (numpy.where(xe >= xc, xc + dx, xc - dx),
+             numpy.where(xe > xc, yc + dy, yc - dy))).tolist()
+
     def intersection(self, bbox, end):
         xo0, yo0, xo1, yo1 = bbox
         xoc, yoc = (xo1 + xo0) / 2, (yo1 + yo0) / 2
@@ -127,9 +194,37 @@ class Rectangle(Shape):
         """
         self._size = size
 
+    def __eq__(self, other):
+        return type(self) is type(other) and self._size == other._size
+
+    def __hash__(self):
+        return hash((type(self), self._size))
+
     def draw(self, canvas, bbox, style):
         return canvas.create_rectangle(self.dimension(bbox), **style)
 
+    def intersections(self, bboxes, ends):
+        if numpy is None or len(bboxes) < _NUMPY_THRESHOLD:
+            return super(Rectangle, self).intersections(bboxes, ends)
+        x0, y0, x1, y1, xe, ye = _arrays(bboxes, ends)
+        xc, yc = (x1 + x0) / 2, (y1 + y0) / 2
+        w, h = x1 - xc, y1 - yc
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            vertical = xe == xc
+            m = numpy.abs((ye - yc) / numpy.where(vertical, 1, xe - xc))
+            flat = m == 0
+            dx = numpy.where(vertical, 0,
+                             numpy.where(flat, w,
+                                         numpy.minimum(
+                                             w, h / numpy.where(flat, 1, m))))
+            dy = numpy.where(vertical, h,
+                             numpy.where(flat, 0, numpy.minimum(h, w * m)))
+
+        return numpy.column_stack(
+            (numpy.where(xe > xc, xc + dx, xc - dx),
+             numpy.where(ye > yc, yc + dy, yc - dy))).tolist()
+
     def intersection(self, bbox, end):
         xo0, yo0, xo1, yo1 = bbox
         xoc, yoc = (xo1 + xo0) / 2, (yo1 + yo0) / 2
@@ -1,3 +1,4 @@
+from collections import defaultdict, OrderedDict
 from copy import deepcopy
 import tkinter
 
@@ -6,7 +7,9 @@ import tkinter
 Utility functions and data structures.
 """
 
-__all__ = ["ObservableSet", "AttrDict", "CanvasToolTip"]
+__all__ = ["ObservableSet", "AttrDict", "SpatialIndex", "BoundsTracker",
+           "LRUCache", "CommandBatch", "tcl_quote", "CanvasToolTip",
+           "CanvasToolTipManager"]
 
 
 class ObservableSet(set):
@@ -90,6 +93,366 @@ class AttrDict(dict):
         return AttrDict(deepcopy(dict(self), memo=memo))
 
 
+class SpatialIndex:
+    """
+    A spatial index of keys by bounding boxes, to efficiently find the keys
+    whose bounding box intersects a given region.
+
+    The index is a uniform grid of square cells, each cell storing the keys
+    whose bounding box intersects it. Bounding boxes spanning too many cells
+    are kept aside and always checked.
+    """
+
+    # Maximal number of cells a bounding box can be stored in
+    MAX_CELLS = 64
+
+    def __init__(self, cell_size=256):
+        """
+        Create a new empty spatial index.
+
+        :param cell_size: the size of the cells of the grid.
+        """
+        self.cell_size = cell_size
+        self._boxes = {}
+        self._cells = defaultdict(set)
+        self._large = set()
+
+    def __contains__(self, key):
+        return key in self._boxes
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def _cell_range(self, bbox):
+        """
+        Return the range of cells covered by bbox.
+
+        :param bbox: the (x0, y0, x1, y1) bounding box.
+        :return: the (cx0, cy0, cx1, cy1) range of cells, bounds included.
+        """
+        x0, y0, x1, y1 = bbox
+        size = self.cell_size
+        return (int(x0 // size), int(y0 // size),
+                int(x1 // size), int(y1 // size))
+
+    def insert(self, key, bbox):
+        """
+        Index key with the given bounding box, replacing its previous one.
+
+        :param key: the key to index;
+        :param bbox: the (x0, y0, x1, y1) bounding box of key.
+        """
+        if self._boxes.get(key) == bbox:
+            return
+        self.remove(key)
+        self._boxes[key] = bbox
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > self.MAX_CELLS:
+            self._large.add(key)
+            return
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells[cx, cy].add(key)
+
+    def remove(self, key):
+        """
+        Remove key from this index, if present.
+
+        :param key: the key to remove.
+        """
+        bbox = self._boxes.pop(key, None)
+        if bbox is None:
+            return
+        if key in self._large:
+            self._large.discard(key)
+            return
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self._cells[cx, cy]
+                cell.discard(key)
+                if not cell:
+                    del self._cells[cx, cy]
+
+    def bbox(self, key):
+        """
+        Return the bounding box of key.
+
+        :param key: an indexed key.
+        :return: the bounding box of key.
+        """
+        return self._boxes[key]
+
+    def query(self, bbox):
+        """
+        Return the keys whose bounding box intersects bbox.
+
+        :param bbox: the (x0, y0, x1, y1) region to query.
+        :return: the set of keys intersecting the region.
+        """
+        x0, y0, x1, y1 = bbox
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        candidates = set(self._large)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # Fewer non-empty cells than cells in the region
+            for (cx, cy), cell in self._cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    candidates.update(cell)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    cell = self._cells.get((cx, cy))
+                    if cell:
+                        candidates.update(cell)
+        result = set()
+        for key in candidates:
+            kx0, ky0, kx1, ky1 = self._boxes[key]
+            if kx0 <= x1 and x0 <= kx1 and ky0 <= y1 and y0 <= ky1:
+                result.add(key)
+        return result
+
+
+class BoundsTracker:
+    """
+    The bounding box of a set of keyed bounding boxes, maintained
+    incrementally.
+
+    Growing or adding boxes expands the bounds in constant time. The bounds
+    are only recomputed, lazily, when a box lying on them shrinks or is
+    removed.
+    """
+
+    def __init__(self):
+        """
+        Create a new empty tracker.
+        """
+        self._boxes = {}
+        self._bounds = None
+        self._outdated = False
+
+    def __contains__(self, key):
+        return key in self._boxes
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def _retracts(self, old, new=None):
+        """
+        Return whether replacing old by new may shrink the bounds.
+
+        :param old: the previous bounding box;
+        :param new: the new bounding box, None if removed.
+        """
+        x0, y0, x1, y1 = self._bounds
+        if new is None:
+            return old[0] <= x0 or old[1] <= y0 or old[2] >= x1 or old[3] >= y1
+        return (old[0] <= x0 < new[0] or old[1] <= y0 < new[1] or
+                new[2] < x1 <= old[2] or new[3] < y1 <= old[3])
+
+    def update(self, key, bbox):
+        """
+        Set the bounding box of key.
+
+        :param key: the key;
+        :param bbox: the (x0, y0, x1, y1) bounding box of key.
+        """
+        old = self._boxes.get(key)
+        self._boxes[key] = bbox
+        if self._outdated:
+            return
+        if self._bounds is None:
+            self._bounds = tuple(bbox)
+            return
+        if old is not None and self._retracts(old, bbox):
+            self._outdated = True
+            return
+        x0, y0, x1, y1 = self._bounds
+        self._bounds = (min(x0, bbox[0]), min(y0, bbox[1]),
+                        max(x1, bbox[2]), max(y1, bbox[3]))
+
+    def remove(self, key):
+        """
+        Remove key, if present.
+
+        :param key: the key to remove.
+        """
+        old = self._boxes.pop(key, None)
+        if old is not None and not self._outdated and \
+                self._retracts(old):
+            self._outdated = True
+
+    def clear(self):
+        """
+        Remove all keys.
+        """
+        self._boxes.clear()
+        self._bounds = None
+        self._outdated = False
+
+    def bounds(self):
+        """
+        Return the bounding box of all bounding boxes, or None if there are
+        none.
+        """
+        if self._outdated:
+            self._outdated = False
+            boxes = self._boxes.values()
+            if boxes:
+                self._bounds = (min(box[0] for box in boxes),
+                                min(box[1] for box in boxes),
+                                max(box[2] for box in boxes),
+                                max(box[3] for box in boxes))
+            else:
+                self._bounds = None
+        return self._bounds
+
+
+# Characters that must be escaped in Tcl words
+_TCL_ESCAPES = {"\\": "\\\\", "{": "\\{", "}": "\\}", "[": "\\[",
+                "]": "\\]", "$": "\\$", '"': '\\"', ";": "\\;",
+                " ": "\\ ", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+_TCL_TRANSLATION = str.maketrans(_TCL_ESCAPES)
+
+
+class LRUCache:
+    """
+    A cache of bounded size, discarding its least recently used entries.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        Create a new empty cache.
+
+        :param maxsize: the maximal number of entries of the cache.
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Return the value cached for key, marking it as recently used.
+
+        :param key: the key of the entry;
+        :param default: the value to return if key is not cached.
+        :return: the cached value, or default.
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Cache value for key, discarding the least recently used entry if the
+        cache is full.
+
+        :param key: the key of the entry;
+        :param value: the value to cache.
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries of this cache.
+        """
+        self._entries.clear()
+
+
+def tcl_quote(value):
+    """
+    Return the given value quoted as a single Tcl word.
+
+    :param value: the value to quote; tuples and lists are quoted as Tcl
+                  lists.
+    :return: the string representing value as a Tcl word.
+    """
+    if isinstance(value, (tuple, list)):
+        value = " ".join(tcl_quote(item) for item in value)
+    value = str(value)
+    if not value:
+        return "{}"
+    return value.translate(_TCL_TRANSLATION)
+
+
+class CommandBatch:
+    """
+    A batch of Tcl commands, evaluated as a single script.
+
+    The batch is a context manager: commands added to the batch are queued
+    until the outermost context is left, then evaluated in one call to the
+    Tcl interpreter.
+    """
+
+    def __init__(self, widget):
+        """
+        Create a new batch of commands evaluated by the interpreter of
+        widget.
+
+        :param widget: the tkinter widget giving access to the interpreter.
+        """
+        self.widget = widget
+        self._commands = []
+        self._depth = 0
+
+    @property
+    def active(self):
+        """
+        Whether commands are currently queued instead of being evaluated.
+        """
+        return self._depth > 0
+
+    def add(self, *words, expect=None):
+        """
+        Queue the command made of the given words.
+
+        :param words: the words of the command; they are quoted when the
+                      batch is flushed;
+        :param expect: if not None, the result the command must return; the
+                       evaluation of the batch fails with a TclError if it
+                       returns another one.
+        """
+        self._commands.append((words, expect))
+
+    def flush(self):
+        """
+        Evaluate all queued commands as a single script.
+        """
+        if not self._commands:
+            return
+        commands = self._commands
+        self._commands = []
+        lines = []
+        for words, expect in commands:
+            line = " ".join(tcl_quote(word) for word in words)
+            if expect is not None:
+                line = "if {{[{}] ne [format %s {}]}} {{error {}}}".format(
+                    line, tcl_quote(expect),
+                    tcl_quote("Unexpected result of: " + line))
+            lines.append(line)
+        self.widget.tk.eval("\n".join(lines))
+
+    def __enter__(self):
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            self.flush()
+        return False
+
+
 class CanvasToolTip:
     """
     Modified from http://tkinter.unpythonic.net/wiki/ToolTip
@@ -192,15 +555,22 @@ class CanvasToolTip:
         self.configure(**opts)
         self._tipwindow = None
         self._id = None
+        self._follow_mouse = 1 if self._opts['follow_mouse'] else 0
+        self._bind(handle)
+
+    def _bind(self, handle):
+        """
+        Install the event bindings of this tooltip.
+
+        :param handle: the handle of the item to show the tooltip on.
+        """
         self._id1 = self.canvas.tag_bind(handle, "<Enter>", self.enter, '+')
         self._id2 = self.canvas.tag_bind(handle, "<Leave>", self.leave, '+')
         self._id3 = self.canvas.tag_bind(handle, "<ButtonPress>", self.leave,
                                          '+')
-        self._follow_mouse = 0
-        if self._opts['follow_mouse']:
+        if self._follow_mouse:
             self._id4 = self.canvas.tag_bind(handle, "<Motion>", self.motion,
                                              '+')
-            self._follow_mouse = 1
 
     def configure(self, **opts):
         for key in opts:
@@ -302,3 +672,94 @@ class CanvasToolTip:
             del opts[opt]
         label = tkinter.Label(self._tipwindow, **opts)
         label.pack()
+
+
+class CanvasToolTipManager(CanvasToolTip):
+    """
+    A tooltip shared by all items of a canvas.
+
+    Instead of binding each item, the manager binds the canvas itself once,
+    and looks up the text of the item under the mouse pointer at each motion;
+    a single tooltip window is created on first use and only withdrawn
+    between two tooltips. The options are the ones of CanvasToolTip, except
+    text and textvariable, given by the items.
+    """
+
+    def __init__(self, canvas, text_of, delay=500, **opts):
+        """
+        Create a new tooltip manager on canvas.
+
+        :param canvas: the canvas to manage the tooltips of;
+        :param text_of: a function returning the tooltip text of the given
+                        item of canvas, or None if it has no tooltip;
+        :param delay: the time in ms before the tooltip appears;
+        :param opts: the other options of the tooltip (see CanvasToolTip).
+        """
+        self.text_of = text_of
+        self._label = None
+        self._shown = False
+        super(CanvasToolTipManager, self).__init__(canvas, None, text=None,
+                                                   delay=delay, **opts)
+
+    def _bind(self, handle):
+        # All items share the bindings of the canvas itself. The bindings of
+        # the canvas for specific buttons, such as the ones of mouses,
+        # shadow these and must call leave themselves
+        self._id1 = self.canvas.bind("<Motion>", self.motion, '+')
+        self._id2 = self.canvas.bind("<Leave>", self.leave, '+')
+        self._id3 = self.canvas.bind("<ButtonPress>",
+                                     lambda event: self.leave(), '+')
+
+    def motion(self, event=None):
+        current = self.canvas.find_withtag("current")
+        text = self.text_of(current[0]) if current else None
+        if text != self._opts['text']:
+            # Entering another tooltip, or leaving one
+            self.leave()
+            self._opts['text'] = text
+            if text is not None:
+                self._schedule()
+        elif self._shown and self._follow_mouse:
+            x, y = self.coords()
+            self._tipwindow.wm_geometry("+{:d}+{:d}".format(int(x), int(y)))
+
+    def leave(self, event=None):
+        self._unschedule()
+        self._hide()
+        if event is not None:
+            self._opts['text'] = None
+
+    def _show(self):
+        self._id = None
+        if self._opts['state'] == 'disabled' or self._opts['text'] is None:
+            return
+        tw = self._tipwindow
+        if tw is None:
+            self._tipwindow = tw = tkinter.Toplevel(self.canvas)
+            tw.withdraw()
+            tw.wm_overrideredirect(1)
+
+            if tw.tk.call("tk", "windowingsystem") == 'aqua':
+                tw.tk.call("::tk::unsupported::MacWindowStyle", "style", tw._w,
+                           "help", "none")
+
+            self.create_contents()
+        else:
+            self._label.configure(text=self._opts['text'])
+        tw.update_idletasks()
+        x, y = self.coords()
+        tw.wm_geometry("+{:d}+{:d}".format(int(x), int(y)))
+        tw.deiconify()
+        self._shown = True
+
+    def _hide(self):
+        if self._shown:
+            self._tipwindow.withdraw()
+            self._shown = False
+
+    def create_contents(self):
+        opts = self._opts.copy()
+        for opt in ('delay', 'follow_mouse', 'state'):
+            del opts[opt]
+        self._label = tkinter.Label(self._tipwindow, **opts)
+        self._label.pack()